@@ -1,19 +1,26 @@
 import streamlit as st
-import pandas as pd
-import os
-import sqlite3
+import hashlib
+import uuid
 from io import BytesIO
-from docx import Document
+# Heavy modules (pandas, numpy via the ranker, docx) are imported where they are
+# used, so the first paint doesn't wait for them.
 from utils.resume_parser import parse_resume
 from utils.matcher import (
     get_match_feedback,
-    get_batched_match_feedback,
+    get_prefiltered_match_feedback,
     get_custom_prompt_feedback,
-    extract_score
+    API_ERROR_TEXT,
+    AUTO_MODEL,
+    MAIN_MODEL,
+    LIGHT_MODEL
 )
-from utils.prompt_templates import build_prompt
-from utils.job_scraper.common import fetch_greenhouse_jobs, fetch_full_job_description
-from utils.history import save_match, get_history
+from utils.dedup import collapse_duplicates
+from utils.history import save_match
+from utils.prefetch import schedule_prefetch, wait_for_prefetch
+from utils.job_index import get_job_index
+from utils.job_store import get_job_store
+from utils import config, metrics
+from utils.task_queue import DONE, QueueFull, get_task_queue
 
 # -------------------- CONFIG --------------------
 SUPPORTED_COMPANIES = {
@@ -22,6 +29,8 @@ SUPPORTED_COMPANIES = {
     "Turing": "turing",
     "Groww": "groww"
 }
+SEARCH_RESULTS = 50
+TOP_K_MATCHES = 5
 
 # -------------------- DB INIT --------------------
 #conn = sqlite3.connect("users.db", check_same_thread=False)
@@ -43,6 +52,8 @@ SUPPORTED_COMPANIES = {
 
 # -------------------- DOCX HELPER --------------------
 def generate_docx(text):
+    from docx import Document
+
     doc = Document()
     for line in text.split("\n"):
         doc.add_paragraph(line)
@@ -85,6 +96,13 @@ def generate_docx(text):
 # -------------------- PAGE CONFIG --------------------
 st.set_page_config(page_title="LazyApply AI", layout="centered")
 
+# Checked once up front so a missing key is one clear message, not an error per analysis.
+if not config.get_setting("together_api_key", None):
+    st.error(
+        "🔑 No Together API key configured. Set TOGETHER_API_KEY or add `[together] api_key` "
+        "to Streamlit secrets; analyses will fail until then."
+    )
+
 # -------------------- LOGOUT UI --------------------
 #if st.session_state.logged_in:
  #   st.sidebar.markdown(f"👋 Welcome, **{st.session_state.name}**")
@@ -94,13 +112,40 @@ st.set_page_config(page_title="LazyApply AI", layout="centered")
  #   login_ui()
 
         
-# -------------------- CACHE JOBS --------------------
-if "job_cache" not in st.session_state:
-    all_jobs = {}
-    for comp_name, slug in SUPPORTED_COMPANIES.items():
-        jobs = fetch_greenhouse_jobs(slug, limit=3, keyword="engineering")
-        all_jobs[comp_name] = jobs
-    st.session_state["job_cache"] = all_jobs
+# -------------------- JOB INDEX --------------------
+# Shared by all sessions; refreshed in the background instead of on page load.
+job_index = get_job_index()
+job_index.start_background_refresh(SUPPORTED_COMPANIES)
+# Sessions get shared, read-only job records from here rather than their own copies.
+job_store = get_job_store()
+metrics.start_metrics_server()
+
+# -------------------- DIAGNOSTICS --------------------
+# Rendered only on demand: collecting the gauges queries the caches and index.
+if st.sidebar.toggle("🩺 Diagnostics"):
+    snapshot = metrics.export_json()
+    latencies = [
+        {
+            "metric": h["name"].removesuffix("_seconds"),
+            **h["labels"],
+            "calls": h["count"],
+            "mean (s)": round(h["mean"], 3) if h["mean"] is not None else None,
+        }
+        for h in snapshot["histograms"] if h["name"].endswith("_seconds")
+    ]
+    if latencies:
+        st.sidebar.dataframe(latencies, hide_index=True)
+    for gauge in snapshot["gauges"]:
+        labels = ", ".join(f"{k}={v}" for k, v in gauge["labels"].items())
+        st.sidebar.caption(f"{gauge['name']}{f' ({labels})' if labels else ''}: {gauge['value']}")
+    spans = metrics.recent_spans(limit=20)
+    if spans:
+        st.sidebar.markdown("**Recent spans**")
+        st.sidebar.dataframe([
+            {"span": s["name"], **s["labels"], "ms": round(s["duration"] * 1000, 1), "error": s["error"]}
+            for s in spans
+        ], hide_index=True)
+    st.sidebar.download_button("Download metrics (Prometheus)", metrics.export_prometheus(), file_name="metrics.prom")
 
 # -------------------- STYLING --------------------
 st.markdown("""
@@ -174,6 +219,128 @@ Your Job Buddy for the Resume Revolution 🚀
 </p>
 """, unsafe_allow_html=True)
 
+# -------------------- BACKGROUND JOBS --------------------
+# LLM calls run on a shared worker pool, so reruns and widget clicks don't
+# lose them; the page polls the job until it finishes.
+TASK_POLL_INTERVAL = 1  # seconds
+CACHED_RESULT_WAIT = 0.3  # seconds; cached (e.g. prefetched) results show without a poll round trip
+task_queue = get_task_queue()
+NO_RESULT_ERROR = "The AI service returned no result. Please try again."
+
+def content_key(*parts):
+    """Task key for these inputs: sessions sending the same content share one job."""
+    return hashlib.sha256("\x00".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+def feedback_job(resume_text, jd_text, mode, section, model):
+    def job(on_progress):
+        wait_for_prefetch(resume_text, jd_text, mode, section, model)
+        result, score = get_custom_prompt_feedback(
+            resume_text=resume_text,
+            jd_text=jd_text,
+            mode=mode,
+            section=section,
+            model=model,
+            on_progress=on_progress
+        )
+        if not result:
+            # The matcher logs API errors instead of reporting to the UI; surface them as a failed job.
+            raise RuntimeError(NO_RESULT_ERROR)
+        save_match(resume_text, jd_text, result, score)
+        return result
+    return job
+
+def top_matches_job(resume_text):
+    def job(on_progress):
+        from utils.ranker import get_job_ranker
+
+        return get_prefiltered_match_feedback(resume_text, get_job_ranker(job_store), top_k=TOP_K_MATCHES)
+    return job
+
+def job_match_job(resume_text, description):
+    def job(on_progress):
+        result, _ = get_match_feedback(resume_text, description)
+        if result == API_ERROR_TEXT:
+            raise RuntimeError(NO_RESULT_ERROR)
+        return result
+    return job
+
+@st.fragment(run_every=TASK_POLL_INTERVAL)
+def show_task_progress():
+    key = st.session_state.get("task_key")
+    task = task_queue.get(key) if key else None
+    if task is None:
+        st.session_state.pop("task_key", None)
+        st.session_state.pop("input_hash", None)
+        st.warning("This analysis expired. Please generate it again.")
+        return
+
+    if not task.finished:
+        ahead = task_queue.position(key)
+        if ahead:
+            st.info(f"⏳ Queued: {ahead} analysis job(s) ahead of yours.")
+        elif task.partial:
+            st.markdown(task.partial + "▌")
+        else:
+            st.info("🔬 Processing your resume...")
+        return
+
+    del st.session_state["task_key"]
+    if task.status == DONE:
+        st.session_state["feedback"] = str(task.result)
+        st.session_state["copied"] = False
+    else:
+        st.session_state.pop("input_hash", None)  # let the user retry
+        st.session_state["task_error"] = str(task.error)
+    st.rerun()
+
+def submit_explore_task(name, key, job):
+    """Starts (or rejoins) the Explore job for name, polled by show_explore_progress()."""
+    try:
+        task = task_queue.submit(key, job)
+    except QueueFull:
+        st.warning("⏳ The server is busy right now. Please try again in a minute.")
+        return
+    st.session_state.setdefault("explore_tasks", {})[name] = key
+    st.session_state.setdefault("explore_results", {}).pop(name, None)
+    task.wait(CACHED_RESULT_WAIT)
+
+@st.fragment(run_every=TASK_POLL_INTERVAL)
+def show_explore_progress(name, message):
+    key = st.session_state["explore_tasks"][name]
+    task = task_queue.get(key)
+    if task is not None and not task.finished:
+        ahead = task_queue.position(key)
+        st.info(f"⏳ Queued: {ahead} job(s) ahead of yours." if ahead else message)
+        return
+
+    del st.session_state["explore_tasks"][name]
+    results = st.session_state.setdefault("explore_results", {})
+    if task is None:
+        results[name] = RuntimeError("This result expired. Please run it again.")
+    else:
+        results[name] = task.result if task.status == DONE else task.error
+    st.rerun()
+
+def explore_result(name, message):
+    """
+    The finished Explore result for name, showing progress while its job runs
+    and the error if it failed. None when there is nothing to show yet.
+    """
+    if name in st.session_state.get("explore_tasks", {}):
+        show_explore_progress(name, message)
+        return None
+    result = st.session_state.get("explore_results", {}).get(name)
+    if isinstance(result, Exception):
+        st.error(f"❌ Matching failed: {result}")
+        return None
+    return result
+
+def show_duplicate_links(duplicates):
+    if duplicates:
+        st.markdown("**Also posted as**: " + ", ".join(
+            f"[{job.title} – {job.location}]({job.link})" for job in duplicates
+        ))
+
 # -------------------- TABS --------------------
 tab1, tab2 = st.tabs([" Match Resume", " Explore Jobs"])
 
@@ -192,35 +359,48 @@ with tab1:
         "Top 1% Candidate Benchmarking",
         "Generate Cover Letter",
         "Suggest Resume Format",
-        "Full Resume Intelligence Report"
+        "Full Resume Intelligence Report",
+        "Full Resume Intelligence Report (Parallel)"
     ])
 
     section = st.selectbox("🔹 Focus on a specific resume section?", [
-        "Entire Resume", "Professional Summary", "Experience", "Education", "Projects"
+        "Entire Resume", "Professional Summary", "Experience", "Education", "Projects", "Skills"
     ]) if mode == "Rewrite to Sound Results-Driven" else "Entire Resume"
 
-    model_choice = st.radio("Choose model:", ["Exaone (Deep & Accurate)", "Mistral (Fast & Light)"], index=0, horizontal=True)
-    chosen_model = "lgai/exaone-3-5-32b-instruct" if "Exaone" in model_choice else "mistralai/Mistral-7B-Instruct-v0.2"
+    model_choice = st.radio("Choose model:", ["Auto (Recommended)", "Exaone (Deep & Accurate)", "Mistral (Fast & Light)"], index=0, horizontal=True)
+    chosen_model = {
+        "Auto (Recommended)": AUTO_MODEL,
+        "Exaone (Deep & Accurate)": MAIN_MODEL,
+        "Mistral (Fast & Light)": LIGHT_MODEL,
+    }[model_choice]
+
+    prefetch_enabled = st.checkbox(
+        "⚡ Prepare likely next modes in the background",
+        help="After each analysis, the modes people usually try next (e.g. ATS, Summary, Cover Letter) "
+             "are generated in the background so switching to them is instant. Limited per user."
+    )
 
     resume_text = parse_resume(uploaded_file) if uploaded_file else None
     submitted = st.button("🚀 Generate Feedback")
 
     if submitted and resume_text and resume_text.strip() and jd_text.strip():
-        key_hash = hash(resume_text + jd_text + mode + section + chosen_model)
+        key_hash = content_key(resume_text, jd_text, mode, section, chosen_model)
 
         if st.session_state.get("input_hash") != key_hash:
-            with st.spinner("🔬 Processing your resume..."):
-                result, score = get_custom_prompt_feedback(
-                    resume_text=resume_text,
-                    jd_text=jd_text,
-                    mode=mode,
-                    section=section,
-                    model=chosen_model
-                )
+            try:
+                task = task_queue.submit(key_hash, feedback_job(resume_text, jd_text, mode, section, chosen_model))
+            except QueueFull:
+                st.warning("⏳ The server is busy right now. Please try again in a minute.")
+            else:
                 st.session_state["input_hash"] = key_hash
-                st.session_state["feedback"] = str(result)
-                st.session_state["copied"] = False
-                save_match(resume_text, jd_text, result)
+                st.session_state["task_key"] = key_hash
+                st.session_state["feedback"] = None
+                if prefetch_enabled:
+                    user_id = st.session_state.setdefault("user_id", uuid.uuid4().hex)
+                    prepared = schedule_prefetch(user_id, resume_text, jd_text, mode, chosen_model)
+                    if prepared:
+                        st.toast("⚡ Preparing in the background: " + ", ".join(prepared))
+                task.wait(CACHED_RESULT_WAIT)
 
     elif submitted:
         if not uploaded_file:
@@ -228,6 +408,11 @@ with tab1:
         elif not jd_text.strip():
             st.warning("Please paste a job description.")
 
+    if st.session_state.get("task_key"):
+        show_task_progress()
+    if st.session_state.get("task_error"):
+        st.error(f"❌ Analysis failed: {st.session_state.pop('task_error')}")
+
     # (no re-run processing)
     if st.session_state.get("feedback"):
         st.markdown(st.session_state["feedback"])
@@ -258,37 +443,72 @@ with tab2:
         default=list(SUPPORTED_COMPANIES.keys())
     )
 
-    # Keyword filter
-    keyword = st.text_input("🔍 Search by keyword", value="", placeholder="e.g., engineering, backend, data...").strip()
+    # Keyword search over title, location, company and description
+    keyword = st.text_input("🔍 Search jobs", value="", placeholder="e.g., backend python, data bangalore...").strip()
+
+    # Location facet, with counts for the current search
+    location_counts = job_index.facet_counts("location", keyword, selected_companies) if selected_companies else {}
+    selected_locations = st.multiselect(
+        "📍 Filter by location",
+        options=list(location_counts.keys()),
+        format_func=lambda loc: f"{loc} ({location_counts[loc]})"
+    )
 
     # Collect matching jobs
-    filtered_jobs = []
+    filtered_jobs = job_store.search(
+        keyword, companies=selected_companies, locations=selected_locations, limit=SEARCH_RESULTS
+    ) if selected_companies else []
+
+    # Rank every indexed job locally, then let the LLM score only the best few
+    if uploaded_file and job_index.count():
+        if st.button(f"🎯 Find my top {TOP_K_MATCHES} jobs across all companies"):
+            resume_text = parse_resume(uploaded_file)
+            submit_explore_task(
+                "top_matches",
+                content_key("top_matches", resume_text, TOP_K_MATCHES, job_index.count()),
+                top_matches_job(resume_text),
+            )
+        ranked = explore_result("top_matches", "🔬 Ranking all jobs against your resume...")
+        for job, similarity, feedback, score, duplicates in ranked or []:
+                label = f"{score}/100" if score is not None else f"similarity {similarity:.2f}"
+                with st.expander(f"🎯 {job.title} – {job.company} ({label})"):
+                    st.markdown(f"**Link**: [Apply Here]({job.link})")
+                    show_duplicate_links(duplicates)
+                    st.markdown(feedback)
+
+    board_errors = job_index.board_errors()
     for comp_name in selected_companies:
-        jobs = st.session_state["job_cache"].get(comp_name, [])
-        for job in jobs:
-            if not keyword or keyword.lower() in job['title'].lower():
-                filtered_jobs.append({**job, "company": comp_name})
+        if comp_name in board_errors:
+            st.caption(f"⚠️ Could not refresh {comp_name} jobs: {board_errors[comp_name]}")
 
-    if not filtered_jobs:
+    if not filtered_jobs and not job_index.count():
+        st.info("⏳ Job index is warming up, check back in a few seconds.")
+    elif not filtered_jobs:
         st.warning("No jobs found for the selected filters.")
     else:
-        for job in filtered_jobs:
-            with st.expander(f"🔧 {job['title']} – {job['location']} ({job['company']})"):
-                st.markdown(f"**Company**: {job['company']}")
-                st.markdown(f"**Location**: {job['location']}")
-                st.markdown(f"**Link**: [Apply Here]({job['link']})")
+        # Reposts of the same job (same title and company, other locations or re-listings) collapse into one entry
+        for job, duplicates in collapse_duplicates(
+            filtered_jobs, text=lambda job: job.description, key=lambda job: (job.title, job.company)
+        ):
+            similar = f" +{len(duplicates)} similar" if duplicates else ""
+            with st.expander(f"🔧 {job.title} – {job.location} ({job.company}){similar}"):
+                st.markdown(f"**Company**: {job.company}")
+                st.markdown(f"**Location**: {job.location}")
+                st.markdown(f"**Link**: [Apply Here]({job.link})")
+                show_duplicate_links(duplicates)
 
                 if uploaded_file:
-                    unique_key = f"{job['title']}_{job['company']}_{job['link'].split('/')[-1]}"
-                    if st.button(f"⚡ Match My Resume with {job['title']} ({job['company']})", key=unique_key):
+                    unique_key = f"{job.title}_{job.company}_{job.link.split('/')[-1]}"
+                    if st.button(f"⚡ Match My Resume with {job.title} ({job.company})", key=unique_key):
                         resume_text = parse_resume(uploaded_file)
-                        with st.spinner("Matching in progress..."):
-                            feedback = get_match_feedback(resume_text, job['summary'])
-                        st.success("✅ Match completed!")
-                        st.text_area(
-                            "📊 Feedback",
-                            feedback if isinstance(feedback, str) else feedback[0],
-                            height=300
+                        submit_explore_task(
+                            unique_key,
+                            content_key("job_match", resume_text, job.description),
+                            job_match_job(resume_text, job.description),
                         )
+                    feedback = explore_result(unique_key, "🔬 Matching in progress...")
+                    if feedback:
+                        st.success("✅ Match completed!")
+                        st.text_area("📊 Feedback", feedback, height=300, key=f"feedback_{unique_key}")
                 else:
                     st.info("Upload resume in Tab 1 to enable matching.")
@@ -0,0 +1,273 @@
+"""
+Headless bulk scoring: every resume in a directory against every job in a
+job set, with bounded concurrency and a checkpoint so interrupted runs pick
+up where they stopped.
+
+    python batch_match.py resumes/ --jobs-file jobs.json --output matches.csv
+    python batch_match.py resumes/ --boards postman,groww --output matches.parquet
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from utils.concurrency import run_concurrently
+from utils.matcher import (
+    API_ERROR_TEXT,
+    LIGHT_MODEL,
+    MAIN_MODEL,
+    extract_score,
+    get_packed_match_feedback,
+    score_match,
+)
+from utils.resume_parser import parse_resume_files
+from utils.text_cleaning import html_to_text
+
+RESUME_EXTENSIONS = (".pdf", ".docx")
+OUTPUT_COLUMNS = ["resume", "job_id", "company", "title", "link", "score", "feedback"]
+
+
+# -------------------- INPUTS --------------------
+def load_resumes(directory, plain=True):
+    names = [name for name in sorted(os.listdir(directory)) if name.lower().endswith(RESUME_EXTENSIONS)]
+    # Files are spread across the parser's process pool: extraction is the CPU cost of a bulk import.
+    parsed_files = parse_resume_files([os.path.join(directory, name) for name in names], plain=plain)
+    resumes = []
+    for name, parsed in zip(names, parsed_files):
+        if parsed and parsed.text.strip():
+            resumes.append((name, parsed.text))
+        else:
+            print(f"Skipping {name}: no text extracted", file=sys.stderr)
+    return resumes
+
+
+def _normalize_job(job, index):
+    description = job.get("description") or html_to_text(
+        job.get("content") or job.get("summary") or "", drop_boilerplate=True
+    )
+    return {
+        "job_id": str(job.get("job_id") or job.get("id") or job.get("link") or index),
+        "company": job.get("company", ""),
+        "title": job.get("title", ""),
+        "link": job.get("link") or job.get("absolute_url", ""),
+        "description": description,
+    }
+
+
+def load_jobs_file(path):
+    if path.endswith(".jsonl"):
+        with open(path) as f:
+            raw = [json.loads(line) for line in f if line.strip()]
+    elif path.endswith(".csv"):
+        with open(path, newline="") as f:
+            raw = list(csv.DictReader(f))
+    else:
+        with open(path) as f:
+            raw = json.load(f)
+    return [_normalize_job(job, i) for i, job in enumerate(raw)]
+
+
+def load_jobs_from_boards(slugs):
+    from utils.job_scraper.boards import fetch_greenhouse_boards
+
+    jobs = []
+    for result in fetch_greenhouse_boards(slugs):
+        if result.error is not None:
+            print(f"Skipping board {result.slug}: {result.error.message}", file=sys.stderr)
+            continue
+        for job in result.jobs:
+            job = dict(job, company=result.slug.capitalize(), job_id=f"{result.slug}:{job['id']}")
+            jobs.append(_normalize_job(job, len(jobs)))
+    return jobs
+
+
+# -------------------- CHECKPOINT --------------------
+def load_checkpoint(path):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # a torn last line from a crash
+            done[(row["resume"], row["job_id"])] = row
+    return done
+
+
+# -------------------- OUTPUT --------------------
+def write_results(rows, path, matrix=False):
+    if matrix:
+        resumes = sorted({row["resume"] for row in rows})
+        job_ids = sorted({row["job_id"] for row in rows})
+        scores = {(row["resume"], row["job_id"]): row["score"] for row in rows}
+        table = [
+            dict({"resume": resume}, **{job_id: scores.get((resume, job_id)) for job_id in job_ids})
+            for resume in resumes
+        ]
+        columns = ["resume"] + job_ids
+    else:
+        table = [{column: row.get(column) for column in OUTPUT_COLUMNS} for row in rows]
+        columns = OUTPUT_COLUMNS
+
+    if path.endswith(".parquet"):
+        try:
+            import pandas as pd
+        except ImportError:
+            sys.exit("Writing Parquet needs pandas and pyarrow: pip install pandas pyarrow")
+        pd.DataFrame(table, columns=columns).to_parquet(path, index=False)
+    else:
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(table)
+
+
+# -------------------- RUN --------------------
+def _row(resume_name, job, score, feedback):
+    return {
+        "resume": resume_name,
+        "job_id": job["job_id"],
+        "company": job["company"],
+        "title": job["title"],
+        "link": job["link"],
+        "score": score,
+        "feedback": feedback,
+    }
+
+
+def _groups(items, text, dedupe, key=None):
+    """{representative key: [members]} with near-duplicate items grouped when dedupe is set."""
+    from utils.dedup import collapse_duplicates
+
+    collapsed = collapse_duplicates(items, text=text, key=key) if dedupe else [(item, []) for item in items]
+    return [(representative, [representative] + duplicates) for representative, duplicates in collapsed]
+
+
+def run(resumes, jobs, checkpoint_path, model, max_workers, chunk_size, pack_size=1, dedupe=True):
+    done = load_checkpoint(checkpoint_path)
+    # Near-duplicate resumes and jobs are scored once, through one representative
+    # pair; every member pair of the two clusters gets that pair's result.
+    resume_groups = _groups(resumes, lambda resume: resume[1], dedupe)
+    job_groups = _groups(
+        jobs, lambda job: job["description"], dedupe, key=lambda job: (job["title"], job["company"])
+    )
+    resume_members = {resume[0]: [name for name, _ in members] for resume, members in resume_groups}
+    job_members = {job["job_id"]: members for job, members in job_groups}
+
+    def fill(checkpoint, resume_name, job, score, feedback):
+        for member_name in resume_members[resume_name]:
+            for member_job in job_members[job["job_id"]]:
+                if (member_name, member_job["job_id"]) not in done:
+                    row = _row(member_name, member_job, score, feedback)
+                    checkpoint.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    done[(member_name, member_job["job_id"])] = row
+
+    # A unit is one request: a resume with one job, or with a pack of jobs.
+    units = []
+    pending_count = 0
+    with open(checkpoint_path, "a") as checkpoint:
+        for (resume_name, resume_text), _ in resume_groups:
+            todo = []
+            for job, _ in job_groups:
+                previous = done.get((resume_name, job["job_id"]))
+                if previous is None:
+                    todo.append(job)
+                else:  # duplicates added since the last run reuse the checkpointed result
+                    fill(checkpoint, resume_name, job, previous["score"], previous["feedback"])
+            pending_count += len(todo)
+            for i in range(0, len(todo), pack_size):
+                units.append((resume_name, resume_text, todo[i:i + pack_size]))
+    total = len(resumes) * len(jobs)
+    skipped = len(resume_groups) * len(job_groups)
+    print(
+        f"{total} pairs, {len(done)} already done, {pending_count} to score "
+        f"({total - skipped} covered by near-duplicates)", file=sys.stderr
+    )
+
+    def score_unit(unit):
+        _, resume_text, unit_jobs = unit
+        if len(unit_jobs) > 1:
+            return get_packed_match_feedback(
+                resume_text, [job["description"] for job in unit_jobs],
+                pack_size=len(unit_jobs), model=model, max_workers=1, dedupe=False,
+            )
+        result = score_match(resume_text, unit_jobs[0]["description"], model=model)
+        return [(result, extract_score(result))]
+
+    failed = 0
+    scored = 0
+    started = time.monotonic()
+    unit_chunk = max(1, chunk_size // pack_size)
+    with open(checkpoint_path, "a") as checkpoint:
+        # Chunks keep memory flat and bound how much work a crash can lose.
+        for offset in range(0, len(units), unit_chunk):
+            chunk = units[offset:offset + unit_chunk]
+
+            def record(i, results, error):
+                nonlocal failed, scored
+                resume_name, _, unit_jobs = chunk[i]
+                for job, (result, score) in zip(unit_jobs, results or [(None, None)] * len(unit_jobs)):
+                    scored += 1
+                    if not result or result == API_ERROR_TEXT:
+                        failed += 1  # not checkpointed, so the next run retries it
+                        continue
+                    fill(checkpoint, resume_name, job, score, result)
+
+            run_concurrently(score_unit, chunk, max_workers=max_workers, on_result=record)
+            checkpoint.flush()
+            os.fsync(checkpoint.fileno())
+            rate = scored / max(time.monotonic() - started, 1e-9)
+            print(f"{scored}/{pending_count} scored ({rate:.1f} pairs/s, {failed} failed)", file=sys.stderr)
+
+    return list(done.values()), failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every resume in a directory against a set of jobs.")
+    parser.add_argument("resume_dir", help="Directory of PDF/DOCX resumes")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--jobs-file", help="Jobs as .json, .jsonl or .csv")
+    source.add_argument("--boards", help="Comma-separated Greenhouse board slugs")
+    parser.add_argument("--output", default="matches.csv", help="Output .csv or .parquet")
+    parser.add_argument("--matrix", action="store_true", help="Write a resume x job score matrix instead of rows")
+    parser.add_argument("--checkpoint", help="Progress file (default: <output>.checkpoint.jsonl)")
+    parser.add_argument("--model", choices=["light", "main"], default="light")
+    parser.add_argument("--max-workers", type=int, default=8, help="Concurrent API calls")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Pairs per checkpoint flush")
+    parser.add_argument("--pack-size", type=int, default=1, help="Jobs scored per request (packed JSON mode when > 1)")
+    parser.add_argument("--no-dedupe", action="store_true", help="Score near-duplicate resumes and jobs separately")
+    parser.add_argument(
+        "--layout", action="store_true",
+        help="Run PDF layout analysis (slower; default is plain text extraction for bulk imports)",
+    )
+    args = parser.parse_args(argv)
+
+    resumes = load_resumes(args.resume_dir, plain=not args.layout)
+    if args.jobs_file:
+        jobs = load_jobs_file(args.jobs_file)
+    else:
+        jobs = load_jobs_from_boards([slug.strip() for slug in args.boards.split(",") if slug.strip()])
+    if not resumes or not jobs:
+        sys.exit(f"Nothing to do: {len(resumes)} resumes, {len(jobs)} jobs")
+
+    rows, failed = run(
+        resumes,
+        jobs,
+        checkpoint_path=args.checkpoint or args.output + ".checkpoint.jsonl",
+        model=MAIN_MODEL if args.model == "main" else LIGHT_MODEL,
+        max_workers=args.max_workers,
+        chunk_size=args.chunk_size,
+        pack_size=max(1, args.pack_size),
+        dedupe=not args.no_dedupe,
+    )
+    write_results(rows, args.output, matrix=args.matrix)
+    print(f"Wrote {len(rows)} results to {args.output}; {failed} pairs failed (rerun to retry)", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Synthetic resume and job description corpus for benchmarks. Everything is
+generated from a seed, so runs on different machines parse the same bytes.
+"""
+import os
+import random
+
+import docx
+
+LINES_PER_PAGE = 48
+
+_SKILLS = [
+    "Python", "Go", "SQL", "Kafka", "Kubernetes", "AWS", "Terraform", "React", "PostgreSQL",
+    "Spark", "Airflow", "Docker", "gRPC", "Redis", "TypeScript", "PyTorch", "dbt", "Snowflake",
+]
+_VERBS = ["Built", "Led", "Designed", "Migrated", "Scaled", "Automated", "Owned", "Reduced", "Shipped"]
+_OBJECTS = [
+    "the payments ledger", "a real-time ingestion pipeline", "the search ranking service",
+    "CI/CD for 40 services", "the on-call rotation", "a feature store", "the billing API",
+]
+
+
+def resume_lines(rng, experience_entries=6):
+    lines = ["Jane Doe", "jane@example.com | +91 98765 43210", "", "Summary",
+             f"Backend engineer with {rng.randint(3, 12)} years building distributed systems.", "", "Experience"]
+    for i in range(experience_entries):
+        lines.append(f"Senior Engineer, Company {i} ({2010 + i} - {2011 + i})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(
+                f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {rng.choice(_SKILLS)} "
+                f"and {rng.choice(_SKILLS)}, cutting latency by {rng.randint(10, 80)}%."
+            )
+    lines += ["", "Education", "B.Tech Computer Science, IIT (2009)", "", "Skills",
+              ", ".join(rng.sample(_SKILLS, 10)), "", "Projects",
+              f"- Open-source {rng.choice(_SKILLS)} client with {rng.randint(100, 5000)} stars."]
+    return lines
+
+
+def job_description(rng, index):
+    required = ", ".join(rng.sample(_SKILLS, 6))
+    return (
+        f"Job {index}: {rng.choice(['Senior', 'Staff', 'Lead'])} Backend Engineer\n"
+        f"We are looking for an engineer to own {rng.choice(_OBJECTS)}.\n"
+        f"Requirements: {rng.randint(3, 8)}+ years of experience; strong {required}.\n"
+        "Responsibilities: design, build and operate services; mentor engineers; own on-call.\n"
+        "We are an equal opportunity employer and value diversity at our company."
+    )
+
+
+def _pdf_escape(line):
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path, lines):
+    """Writes a minimal text-only PDF (Helvetica, one text object per page)."""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        stream = "BT /F1 10 Tf 14 TL 50 800 Td " + " ".join(
+            f"({_pdf_escape(line)}) Tj T*" for line in page_lines
+        ) + " ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        page_ids.append(len(objects) + 1)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path, lines):
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def build_corpus(directory, count=6, seed=0):
+    """
+    Writes count resumes to directory, alternating PDF and DOCX and growing
+    in length (the largest PDFs span enough pages to use the parallel path).
+    Returns the file paths.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        lines = resume_lines(rng, experience_entries=4 + i * 12)
+        extension = "pdf" if i % 2 == 0 else "docx"
+        path = os.path.join(directory, f"resume_{i:02d}.{extension}")
+        (write_pdf if extension == "pdf" else write_docx)(path, lines)
+        paths.append(path)
+    return paths
+
+
+def build_job_descriptions(count, seed=0):
+    rng = random.Random(seed)
+    return [job_description(rng, i) for i in range(count)]
@@ -0,0 +1,231 @@
+"""
+Local stand-in for the Together chat completions API and the Greenhouse
+boards API, with configurable latency, jitter and error injection.
+
+    python -m benchmarks.mock_server --port 8765 --latency 0.4 --jitter 0.2 --error-rate 0.05
+
+Point the app at it with:
+
+    TOGETHER_API_URL=http://127.0.0.1:8765/v1/chat/completions
+    GREENHOUSE_API_BASE=http://127.0.0.1:8765/v1/boards
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+JOBS_PER_BOARD = 40
+TOKEN_DELAY = 0.005   # seconds between streamed tokens
+
+_PACKED_COUNT_RE = re.compile(r"each of the (\d+) job descriptions")
+_BOARD_PATH_RE = re.compile(r"^/v1/boards/([\w-]+)/jobs")
+_JOB_PAGE_RE = re.compile(r"^/jobs/([\w-]+)/(\d+)")
+
+
+def _score_for(text):
+    # Deterministic per prompt, so cached and uncached runs agree.
+    return int(hashlib.sha256(text.encode()).hexdigest()[:4], 16) % 101
+
+
+def _completion_text(prompt):
+    packed = _PACKED_COUNT_RE.search(prompt)
+    if packed:
+        count = int(packed.group(1))
+        return json.dumps([
+            {"job": i, "score": _score_for(f"{prompt}{i}"), "reasoning": "Solid overlap on core skills."}
+            for i in range(1, count + 1)
+        ])
+    return (
+        "The candidate's experience lines up with most of the listed requirements, "
+        "with gaps in cloud infrastructure and stakeholder management.\n"
+        f"Match score: {_score_for(prompt)} out of 100"
+    )
+
+
+def _board_jobs(slug, base_url):
+    locations = ["Bengaluru", "Remote", "New York", "London"]
+    return [
+        {
+            "id": 1000 + i,
+            "title": f"{['Senior', 'Staff', 'Junior'][i % 3]} {['Backend', 'Data', 'Platform', 'ML'][i % 4]} Engineer",
+            "location": {"name": locations[i % len(locations)]},
+            "updated_at": "2024-01-01T00:00:00Z",
+            "absolute_url": f"{base_url}/jobs/{slug}/{1000 + i}",
+            "content": (
+                "&lt;div class=&quot;content-intro&quot;&gt;&lt;p&gt;About us.&lt;/p&gt;&lt;/div&gt;"
+                f"&lt;p&gt;Build and operate {slug} services in Python and Go. "
+                "Own reliability, observability and on-call.&lt;/p&gt;"
+                "&lt;ul&gt;&lt;li&gt;5+ years experience&lt;/li&gt;&lt;li&gt;SQL, Kafka, Kubernetes&lt;/li&gt;&lt;/ul&gt;"
+            ),
+        }
+        for i in range(JOBS_PER_BOARD)
+    ]
+
+
+class MockServer:
+    """
+    Runs the mock API on a daemon thread. latency and jitter are seconds
+    (jitter is added uniformly at random); error_rate is the fraction of
+    requests answered with error_status.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_status=500, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def completions_url(self):
+        return f"{self.base_url}/v1/chat/completions"
+
+    @property
+    def boards_url(self):
+        return f"{self.base_url}/v1/boards"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay_and_fail(self):
+        """Sleeps for the configured latency; returns True when this request should fail."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+        return fail
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, status, body=b"", content_type="application/json", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_error(self):
+                headers = {"Retry-After": "0"} if server.error_status in (429, 503) else None
+                self._send(server.error_status, b'{"error": "injected failure"}', headers=headers)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path != "/v1/chat/completions":
+                    self._send(404)
+                    return
+                if server._delay_and_fail():
+                    self._send_error()
+                    return
+
+                prompt = payload["messages"][-1]["content"]
+                text = _completion_text(prompt)
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}
+                if not payload.get("stream"):
+                    body = {
+                        "model": payload.get("model"),
+                        "choices": [{"message": {"role": "assistant", "content": text}}],
+                        "usage": usage,
+                    }
+                    self._send(200, json.dumps(body).encode())
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for token in re.findall(r"\S+\s*", text):
+                    event = {"choices": [{"delta": {"content": token}}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                    time.sleep(TOKEN_DELAY)
+                self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+            def do_GET(self):
+                board = _BOARD_PATH_RE.match(self.path)
+                page = _JOB_PAGE_RE.match(self.path)
+                if not board and not page:
+                    self._send(404)
+                    return
+                if server._delay_and_fail():
+                    self._send_error()
+                    return
+
+                if page:
+                    slug, job_id = page.groups()
+                    html = (
+                        f"<html><body><div id='content'><h1>Job {job_id} at {slug}</h1>"
+                        "<p>Build and operate backend services.</p></div></body></html>"
+                    )
+                    self._send(200, html.encode(), content_type="text/html")
+                    return
+
+                body = json.dumps({"jobs": _board_jobs(board.group(1), server.base_url)}).encode()
+                etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, headers={"ETag": etag})
+                    return
+                self._send(200, body, headers={"ETag": etag})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Together + Greenhouse API for local benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="Status code of injected failures")
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status)
+    print(f"Mock API on {server.base_url} (completions: {server.completions_url}, boards: {server.boards_url})")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
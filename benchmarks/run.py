@@ -0,0 +1,270 @@
+"""
+Reproducible benchmarks against the local mock API. Each run appends one
+record to a JSONL log and is compared with the previous run that used the
+same configuration, so regressions show up as soon as they land.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --latency 0.3 --jitter 0.2 --workers 1,8,16 --fail-on-regression
+    python -m benchmarks.run --suites parse,history
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from io import BytesIO
+
+from benchmarks.corpus import build_corpus, build_job_descriptions
+from benchmarks.mock_server import MockServer
+
+SUITES = ("batched", "prompt", "parse", "history")
+RESULTS_FILE = os.path.join(os.path.dirname(__file__), "results.jsonl")
+REGRESSION_THRESHOLD = 0.2   # relative change that counts as a regression
+
+
+class NamedBytesIO(BytesIO):
+    """Stands in for a Streamlit upload: bytes plus a file name."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def summarize(latencies, seconds, ops, errors=0):
+    latencies = sorted(latencies)
+    return {
+        "ops": ops,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "ops_per_sec": round(ops / seconds, 2) if seconds else None,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else None,
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3) if latencies else None,
+    }
+
+
+def timed_loop(func, items):
+    latencies = []
+    started = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started, len(items))
+
+
+# -------------------- SUITES --------------------
+def bench_batched(args, resume_text):
+    from utils.matcher import API_ERROR_TEXT, get_batched_match_feedback
+
+    results = {}
+    for workers in args.workers:
+        for warm in (False, True):
+            # Cold runs use JDs no earlier run has seen, so every call misses the response cache.
+            jds = build_job_descriptions(args.jobs, seed=workers)
+            if warm:
+                get_batched_match_feedback(resume_text, jds, max_workers=workers)
+            latencies, errors, ops = [], 0, 0
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                batch = jds if warm else [f"{jd}\nRef: {time.time_ns()}" for jd in jds]
+                t0 = time.perf_counter()
+                feedback = get_batched_match_feedback(resume_text, batch, max_workers=workers)
+                latencies.append(time.perf_counter() - t0)
+                errors += sum(1 for result, _ in feedback if result == API_ERROR_TEXT)
+                ops += len(batch)
+            name = f"batched_feedback[workers={workers}{',cached' if warm else ''}]"
+            results[name] = summarize(latencies, time.perf_counter() - started, ops, errors)
+    return results
+
+
+def bench_prompt(args, resume_text):
+    from utils.prompt_templates import PROMPT_TEMPLATES, build_prompt
+
+    jds = build_job_descriptions(args.jobs * args.repeat, seed=1)
+    modes = list(PROMPT_TEMPLATES)
+    cases = [(modes[i % len(modes)], jd) for i, jd in enumerate(jds)]
+    return {
+        "build_prompt": timed_loop(lambda case: build_prompt(resume_text, case[1], mode=case[0]), cases),
+        "build_prompt[repeat_inputs]": timed_loop(lambda case: build_prompt(resume_text, jds[0], mode=case[0]), cases),
+    }
+
+
+def bench_parse(args, corpus):
+    from utils.resume_parser import _parse_cache, parse_resume
+
+    uploads = []
+    for path in corpus:
+        with open(path, "rb") as f:
+            uploads.append((f.read(), os.path.basename(path)))
+
+    def parse_cold(upload):
+        _parse_cache.clear()
+        parse_resume(NamedBytesIO(*upload))
+
+    results = {}
+    for extension in ("pdf", "docx"):
+        files = [upload for upload in uploads if upload[1].endswith(extension)] * args.repeat
+        results[f"parse_resume[{extension}]"] = timed_loop(parse_cold, files)
+    for upload in uploads:
+        parse_resume(NamedBytesIO(*upload))
+    results["parse_resume[cached]"] = timed_loop(lambda upload: parse_resume(NamedBytesIO(*upload)), uploads * args.repeat)
+    return results
+
+
+def bench_history(args, resume_text):
+    from utils.history import get_history, save_match
+
+    feedback = "Solid overlap on core skills.\nMatch score: 72 out of 100"
+    writes = list(range(args.jobs * args.repeat * 5))
+    return {
+        "history_write": timed_loop(lambda i: save_match(resume_text, f"JD {i}", feedback, score=i % 101), writes),
+        "history_page": timed_loop(lambda i: get_history(limit=50, min_score=i % 50), writes[:200]),
+    }
+
+
+# -------------------- LOG + REGRESSIONS --------------------
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_previous(path, config):
+    previous = None
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("config") == config:
+                    previous = record
+    return previous
+
+
+def compare(current, previous, threshold):
+    """Returns (name, metric, before, after) for every metric that got worse by more than threshold."""
+    regressions = []
+    for name, result in current.items():
+        before = (previous or {}).get(name)
+        if not before:
+            continue
+        if before["ops_per_sec"] and result["ops_per_sec"] is not None \
+                and result["ops_per_sec"] < before["ops_per_sec"] * (1 - threshold):
+            regressions.append((name, "ops_per_sec", before["ops_per_sec"], result["ops_per_sec"]))
+        if before["p95_ms"] and result["p95_ms"] is not None and result["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            regressions.append((name, "p95_ms", before["p95_ms"], result["p95_ms"]))
+        if result["errors"] > before["errors"]:
+            regressions.append((name, "errors", before["errors"], result["errors"]))
+    return regressions
+
+
+def print_table(results, previous):
+    print(f"{'benchmark':42} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'errors':>7} {'vs last':>8}", file=sys.stderr)
+    for name, result in results.items():
+        before = (previous or {}).get(name)
+        change = ""
+        if before and before["ops_per_sec"] and result["ops_per_sec"]:
+            change = f"{(result['ops_per_sec'] / before['ops_per_sec'] - 1) * 100:+.0f}%"
+        print(
+            f"{name:42} {result['ops_per_sec'] or 0:>10.1f} {result['p50_ms'] or 0:>10.2f} "
+            f"{result['p95_ms'] or 0:>10.2f} {result['errors']:>7} {change:>8}",
+            file=sys.stderr,
+        )
+
+
+# -------------------- MAIN --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark matching, prompts, parsing and history against a mock API.")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock API base latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Mock API random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of mock API requests that fail")
+    parser.add_argument("--jobs", type=int, default=20, help="Job descriptions per batch")
+    parser.add_argument("--workers", default="1,8", help="Comma-separated batch concurrency levels to sweep")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--corpus-size", type=int, default=6, help="Generated resumes (PDF and DOCX alternate)")
+    parser.add_argument("--results", default=RESULTS_FILE, help="JSONL log runs are appended to")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--label", help="Free-form note stored with the run")
+    parser.add_argument("--no-save", action="store_true", help="Compare with the log but do not append to it")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+    args.workers = [int(w) for w in args.workers.split(",") if w.strip()]
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="lazyapply-bench-")
+    server = MockServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=0).start()
+    # Must be set before utils is imported: these are read at import time.
+    os.environ.update({
+        "TOGETHER_API_KEY": "benchmark",
+        "TOGETHER_API_URL": server.completions_url,
+        "GREENHOUSE_API_BASE": server.boards_url,
+        "LAZYAPPLY_CACHE_DB": os.path.join(workdir, "llm_cache.sqlite3"),
+        "LAZYAPPLY_HISTORY_DB": os.path.join(workdir, "history.sqlite3"),
+        "LAZYAPPLY_JOB_INDEX_DB": os.path.join(workdir, "jobs.sqlite3"),
+    })
+
+    corpus = build_corpus(os.path.join(workdir, "resumes"), count=args.corpus_size)
+    from utils.resume_parser import parse_resume
+    with open(corpus[0], "rb") as f:
+        resume_text = parse_resume(NamedBytesIO(f.read(), os.path.basename(corpus[0])))
+
+    runners = {
+        "batched": lambda: bench_batched(args, resume_text),
+        "prompt": lambda: bench_prompt(args, resume_text),
+        "parse": lambda: bench_parse(args, corpus),
+        "history": lambda: bench_history(args, resume_text),
+    }
+    results = {}
+    try:
+        for suite in suites:
+            print(f"Running {suite}...", file=sys.stderr)
+            results.update(runners[suite]())
+    finally:
+        server.stop()
+
+    config = {
+        "suites": suites, "latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate,
+        "jobs": args.jobs, "workers": args.workers, "repeat": args.repeat, "corpus_size": args.corpus_size,
+    }
+    previous = load_previous(args.results, config)
+    previous_results = previous["results"] if previous else None
+    print_table(results, previous_results)
+
+    if not args.no_save:
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "label": args.label,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "config": config,
+            "results": results,
+        }
+        with open(args.results, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    regressions = compare(results, previous_results, args.threshold)
+    for name, metric, before, after in regressions:
+        print(f"REGRESSION {name}: {metric} {before} -> {after}", file=sys.stderr)
+    if previous:
+        print(f"Compared with {previous['timestamp']} ({previous.get('commit') or 'unknown commit'})", file=sys.stderr)
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
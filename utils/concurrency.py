@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import time
+
+DEFAULT_MAX_WORKERS = 8
+
+
+def run_concurrently(func, items, max_workers=DEFAULT_MAX_WORKERS, timeout=None, on_result=None):
+    """
+    Runs func(item) for every item on a bounded thread pool.
+
+    Returns a list of (result, error) tuples in the same order as items.
+    A call that raised gets (None, exception); a call still running when
+    the batch timeout expires gets (None, TimeoutError). on_result, if given,
+    is called as on_result(index, result, error) in the calling thread as
+    each call finishes.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    results = [(None, TimeoutError("Batch timed out"))] * len(items)
+    deadline = time.monotonic() + timeout if timeout else None
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+    try:
+        pending = {executor.submit(func, item): i for i, item in enumerate(items)}
+        while pending:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                try:
+                    results[i] = (future.result(), None)
+                except Exception as e:
+                    results[i] = (None, e)
+                if on_result is not None:
+                    on_result(i, *results[i])
+    finally:
+        # Don't block on stragglers past the deadline; their results are dropped.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
@@ -0,0 +1,87 @@
+import os
+import threading
+
+# Where Streamlit secrets keep settings that predate this module.
+SECRETS_PATHS = {
+    "together_api_key": ("together", "api_key"),
+    "together_api_url": ("together", "api_url"),
+}
+
+_MISSING = object()
+_explicit = {}
+_on_change = []
+_lock = threading.Lock()
+
+
+class ConfigError(Exception):
+    """A required setting was not found in any provider."""
+
+
+def explicit_provider(name):
+    return _explicit.get(name)
+
+
+def env_provider(name):
+    return os.environ.get(name.upper())
+
+
+def streamlit_secrets_provider(name):
+    """
+    Reads st.secrets, importing Streamlit only when no earlier provider had
+    the setting, so CLIs and workers never pay for it when env is set.
+    """
+    try:
+        import streamlit as st
+        value = st.secrets
+        for part in SECRETS_PATHS.get(name, (name,)):
+            value = value[part]
+        return value
+    except Exception:
+        # No secrets file, missing key, or Streamlit not installed.
+        return None
+
+
+_providers = [explicit_provider, env_provider, streamlit_secrets_provider]
+
+
+def register_provider(provider, first=False):
+    """
+    Adds a callable name -> value (or None). Providers are asked in order;
+    first=True puts the new one ahead of env and secrets.
+    """
+    with _lock:
+        if first:
+            _providers.insert(1, provider)   # explicit values still win
+        else:
+            _providers.append(provider)
+
+
+def configure(**settings):
+    """Sets settings explicitly; they take precedence over every provider."""
+    with _lock:
+        _explicit.update(settings)
+    for callback in _on_change:
+        callback()
+
+
+def get_setting(name, default=_MISSING):
+    """
+    Returns the first value any provider has for name: explicit, then the
+    env var NAME, then Streamlit secrets. Raises ConfigError if none has
+    it and no default was given.
+    """
+    for provider in list(_providers):
+        value = provider(name)
+        if value not in (None, ""):
+            return value
+    if default is _MISSING:
+        raise ConfigError(
+            f"Missing setting {name!r}: set the {name.upper()} environment variable, "
+            f"call utils.config.configure({name}=...), or add it to Streamlit secrets"
+        )
+    return default
+
+
+def on_change(callback):
+    """Registers a callback run after configure(), e.g. to drop a cached client."""
+    _on_change.append(callback)
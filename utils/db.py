@@ -0,0 +1,17 @@
+import os
+import sqlite3
+
+
+def connect(path):
+    """
+    Opens a SQLite database that can be shared across threads, Streamlit
+    sessions and worker processes.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
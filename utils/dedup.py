@@ -0,0 +1,127 @@
+import hashlib
+import re
+from functools import lru_cache
+
+NUM_PERM = 64               # MinHash signature length
+BANDS = 8                   # LSH bands of NUM_PERM // BANDS rows; catches ~90% of pairs at 0.85
+SHINGLE_SIZE = 5            # words per shingle
+DUPLICATE_THRESHOLD = 0.85  # estimated Jaccard similarity that counts as a duplicate
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+@lru_cache(maxsize=4)
+def _permutations(num_perm):
+    import numpy as np
+
+    rng = np.random.default_rng(42)
+    # Multiply-add mod 2**64 (uint64 arithmetic wraps): odd multipliers make
+    # each map a bijection, and the high bits, which decide the minimum, mix well.
+    a = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)
+    return a, b
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM):
+    """
+    Returns a (len(texts), num_perm) uint64 array of MinHash signatures over
+    word shingles. Texts with no words get an all-max signature.
+    """
+    import numpy as np
+
+    a, b = _permutations(num_perm)
+    signatures = np.full((len(texts), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+            for shingle in shingles(text)
+        ]
+        if hashes:
+            values = np.array(hashes, dtype=np.uint64)[:, None]
+            signatures[i] = (values * a + b).min(axis=0)
+    return signatures
+
+
+def normalize_key(value):
+    """Case/whitespace/punctuation-insensitive form of a group key (a string or tuple of strings)."""
+    if isinstance(value, tuple):
+        return tuple(normalize_key(part) for part in value)
+    if isinstance(value, str):
+        return " ".join(_WORD_RE.findall(value.lower()))
+    return value
+
+
+def cluster_representatives(texts, threshold=DUPLICATE_THRESHOLD, num_perm=NUM_PERM, bands=BANDS, groups=None):
+    """
+    Clusters near-duplicate texts. Returns a list where entry i is the index
+    of the representative of text i's cluster: the cluster's first member,
+    so a text that has no duplicates is its own representative. groups, if
+    given, holds a key per text (e.g. title and company); only texts whose
+    normalised keys are equal can share a cluster, however similar the bodies.
+    """
+    texts = list(texts)
+    groups = [normalize_key(group) for group in groups] if groups is not None else [None] * len(texts)
+    parent = list(range(len(texts)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    # Exact duplicates (after whitespace/case normalization) need no hashing.
+    first_seen = {}
+    for i, text in enumerate(texts):
+        key = (groups[i], " ".join(_WORD_RE.findall(text.lower())))
+        if key in first_seen:
+            union(first_seen[key], i)
+        else:
+            first_seen[key] = i
+    candidates = list(first_seen.values())
+
+    if len(candidates) > 1:
+        signatures = minhash_signatures([texts[i] for i in candidates], num_perm)
+        rows = num_perm // bands
+        checked = set()
+        for band in range(bands):
+            buckets = {}
+            for position, row in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+                buckets.setdefault((groups[candidates[position]], row.tobytes()), []).append(position)
+            for members in buckets.values():
+                for x, p in enumerate(members):
+                    for q in members[x + 1:]:
+                        if (p, q) in checked:
+                            continue
+                        checked.add((p, q))
+                        if (signatures[p] == signatures[q]).mean() >= threshold:
+                            union(candidates[p], candidates[q])
+
+    return [find(i) for i in range(len(texts))]
+
+
+def collapse_duplicates(items, text=lambda item: item, key=None, threshold=DUPLICATE_THRESHOLD):
+    """
+    Groups items whose text(item) are near-duplicates and, if key is given,
+    whose key(item) match after normalisation. Returns
+    [(representative, [duplicates])] in the order representatives appear.
+    """
+    items = list(items)
+    keys = [key(item) for item in items] if key is not None else None
+    groups = {}
+    for i, representative in enumerate(
+        cluster_representatives([text(item) for item in items], threshold, groups=keys)
+    ):
+        groups.setdefault(representative, []).append(items[i])
+    return [(members[0], members[1:]) for members in groups.values()]
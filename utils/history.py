@@ -1,35 +1,176 @@
 import json
 import os
+import threading
+import time
 from datetime import datetime
 
-HISTORY_FILE = "match_history.json"
+from utils import metrics
+from utils.db import connect
 
-def save_match(resume_text, jd_text, feedback):
+HISTORY_DB = os.environ.get("LAZYAPPLY_HISTORY_DB", "match_history.sqlite3")
+HISTORY_FILE = "match_history.json"  # legacy store, imported once
+PAGE_SIZE = 50
+
+_conn = None
+_lock = threading.Lock()
+
+
+def _get_conn():
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                conn = connect(HISTORY_DB)
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS matches (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        created_at REAL NOT NULL,
+                        timestamp TEXT NOT NULL,
+                        resume_excerpt TEXT,
+                        jd_excerpt TEXT,
+                        feedback TEXT,
+                        score INTEGER
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_matches_created ON matches (created_at);
+                    CREATE INDEX IF NOT EXISTS idx_matches_score ON matches (score);
+                """)
+                _import_legacy_file(conn)
+                _conn = conn
+    return _conn
+
+
+def _import_legacy_file(conn):
+    """
+    Imports the legacy JSON history into an empty matches table. Safe when
+    several processes start at once: the emptiness check and the inserts
+    share one write transaction, and a file another process already moved
+    away is skipped.
+    """
+    if conn.execute("SELECT 1 FROM matches LIMIT 1").fetchone():
+        return
+    try:
+        with open(HISTORY_FILE, "r") as f:
+            history = json.load(f)
+    except FileNotFoundError:
+        return
+    except json.JSONDecodeError:
+        history = []
+
+    rows = []
+    for entry in reversed(history):  # the JSON file is newest first
+        try:
+            created_at = datetime.strptime(entry["timestamp"], "%Y-%m-%d %H:%M:%S").timestamp()
+        except (KeyError, ValueError):
+            created_at = 0.0
+        rows.append((
+            created_at, entry.get("timestamp", ""), entry.get("resume_excerpt"),
+            entry.get("jd_excerpt"), entry.get("feedback"), entry.get("score"),
+        ))
+    # IMMEDIATE takes the write lock up front, so a second process waits here
+    # and then sees the rows the first one imported.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("SELECT 1 FROM matches LIMIT 1").fetchone():
+            conn.execute("ROLLBACK")
+            return
+        conn.executemany(
+            "INSERT INTO matches (created_at, timestamp, resume_excerpt, jd_excerpt, feedback, score) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    try:
+        os.replace(HISTORY_FILE, HISTORY_FILE + ".migrated")
+    except FileNotFoundError:
+        pass
+
+
+def save_match(resume_text, jd_text, feedback, score=None):
+    now = time.time()
     entry = {
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S"),
         "resume_excerpt": resume_text[:300],
         "jd_excerpt": jd_text[:300] if jd_text else "N/A",
-        "feedback": feedback
+        "feedback": feedback,
+        "score": score
     }
 
-    history = []
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r") as f:
-            try:
-                history = json.load(f)
-            except json.JSONDecodeError:
-                history = []
+    conn = _get_conn()
+    with metrics.timer("history_write"), _lock:
+        cursor = conn.execute(
+            "INSERT INTO matches (created_at, timestamp, resume_excerpt, jd_excerpt, feedback, score) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (now, entry["timestamp"], entry["resume_excerpt"], entry["jd_excerpt"], entry["feedback"], score),
+        )
+    entry["id"] = cursor.lastrowid
+    return entry
 
-    history.insert(0, entry)  # newest first
 
-    with open(HISTORY_FILE, "w") as f:
-        json.dump(history, f, indent=2)
+def get_history(limit=PAGE_SIZE, offset=0, before_id=None, since=None, until=None, min_score=None, max_score=None):
+    """
+    Returns saved matches newest first. Page with limit/offset, or pass the
+    last seen id as before_id for cheap keyset paging. since/until are
+    datetimes or epoch seconds.
+    """
+    clauses, params = [], []
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since.timestamp() if isinstance(since, datetime) else since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until.timestamp() if isinstance(until, datetime) else until)
+    if min_score is not None:
+        clauses.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        clauses.append("score <= ?")
+        params.append(max_score)
 
-def get_history():
-    if not os.path.exists(HISTORY_FILE):
-        return []
-    with open(HISTORY_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return []
+    query = "SELECT id, timestamp, resume_excerpt, jd_excerpt, feedback, score FROM matches"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id DESC LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+
+    conn = _get_conn()
+    with _lock:
+        rows = conn.execute(query, params).fetchall()
+    return [
+        {
+            "id": id_,
+            "timestamp": timestamp,
+            "resume_excerpt": resume_excerpt,
+            "jd_excerpt": jd_excerpt,
+            "feedback": feedback,
+            "score": score,
+        }
+        for id_, timestamp, resume_excerpt, jd_excerpt, feedback, score in rows
+    ]
+
+
+def compact_history(keep_latest=None, older_than=None):
+    """
+    Drops old matches (beyond the newest keep_latest, and/or created before
+    older_than) and returns the freed space to the filesystem.
+    Returns the number of deleted matches.
+    """
+    conn = _get_conn()
+    deleted = 0
+    with _lock:
+        if keep_latest is not None:
+            deleted += conn.execute(
+                "DELETE FROM matches WHERE id NOT IN (SELECT id FROM matches ORDER BY id DESC LIMIT ?)",
+                (keep_latest,),
+            ).rowcount
+        if older_than is not None:
+            cutoff = older_than.timestamp() if isinstance(older_than, datetime) else older_than
+            deleted += conn.execute("DELETE FROM matches WHERE created_at < ?", (cutoff,)).rowcount
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+    return deleted
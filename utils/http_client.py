@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils import metrics
+
+CONNECT_TIMEOUT = 5      # seconds
+READ_TIMEOUT = 30        # seconds
+POOL_MAXSIZE = 16        # keep-alive connections per host
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5       # seconds, doubled on every attempt
+BACKOFF_MAX = 30         # seconds, also caps Retry-After
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_rate_limits = {}
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread talking to one host.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def set_rate_limit(host, rate, burst=None):
+    """
+    Limits requests to host (e.g. "boards-api.greenhouse.io") to rate per
+    second across all threads. A rate of None removes the limit.
+    """
+    if rate is None:
+        _rate_limits.pop(host, None)
+    else:
+        _rate_limits[host] = RateLimiter(rate, burst)
+
+
+def has_rate_limit(host):
+    return host in _rate_limits
+
+
+def get_session(url):
+    """
+    Returns the shared keep-alive session for the URL's host, creating it on
+    first use. Each host gets its own connection pool.
+    """
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount(host, adapter)
+                _sessions[host] = session
+    return session
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff(attempt):
+    # Full jitter: sleep a random amount up to the exponential ceiling.
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def request(method, url, timeout=None, max_retries=MAX_RETRIES, **kwargs):
+    """
+    Sends a request through the pooled session for the URL's host, waiting
+    for the host's rate limit if one is set.
+
+    Retries 429/5xx responses and connection failures with exponential
+    backoff and jitter, honouring Retry-After when the server sends it.
+    Read timeouts are only retried for idempotent methods. The final
+    response is returned as-is; the final exception is re-raised.
+    """
+    method = method.upper()
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    session = get_session(url)
+    host = urlsplit(url).hostname
+    limiter = _rate_limits.get(host)
+
+    for attempt in range(max_retries + 1):
+        last_attempt = attempt == max_retries
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.ConnectionError:
+            metrics.inc("http_errors_total", host=host, error="connection")
+            if last_attempt:
+                raise
+            metrics.inc("http_retries_total", host=host, reason="connection")
+            time.sleep(_backoff(attempt))
+            continue
+        except requests.Timeout:
+            metrics.inc("http_errors_total", host=host, error="timeout")
+            if last_attempt or method not in IDEMPOTENT_METHODS:
+                raise
+            metrics.inc("http_retries_total", host=host, reason="timeout")
+            time.sleep(_backoff(attempt))
+            continue
+
+        metrics.inc("http_responses_total", host=host, status=response.status_code)
+        if response.status_code not in RETRY_STATUSES or last_attempt:
+            return response
+
+        metrics.inc("http_retries_total", host=host, reason=response.status_code)
+
+        delay = _retry_after(response)
+        response.close()
+        time.sleep(min(BACKOFF_MAX, delay) if delay is not None else _backoff(attempt))
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,311 @@
+import os
+import re
+import threading
+import time
+
+from utils import metrics
+from utils.db import connect
+from utils.job_scraper.boards import fetch_greenhouse_boards
+from utils.text_cleaning import html_to_text
+
+INDEX_PATH = os.environ.get("LAZYAPPLY_JOB_INDEX_DB", os.path.join(".cache", "jobs.sqlite3"))
+REFRESH_INTERVAL = 15 * 60   # seconds between board refreshes
+SEARCH_LIMIT = 50
+FACET_FIELDS = ("company", "location")
+
+_QUERY_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class JobIndex:
+    """
+    Local SQLite copy of the tracked Greenhouse boards. Sessions read from it
+    directly; a background thread keeps it fresh.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                board TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                company TEXT NOT NULL,
+                title TEXT NOT NULL,
+                location TEXT,
+                content TEXT,
+                description TEXT,
+                link TEXT,
+                updated_at TEXT,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (board, job_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_company ON jobs (company);
+            CREATE TABLE IF NOT EXISTS boards (
+                board TEXT PRIMARY KEY,
+                company TEXT NOT NULL,
+                refreshed_at REAL,
+                error TEXT,
+                etag TEXT,
+                last_modified TEXT
+            );
+        """)
+        self._init_search()
+        self._refresher = None
+        self._stop = threading.Event()
+
+    def _init_search(self):
+        """
+        Full-text index over title, location, company and the cleaned
+        description (board intro/outro removed), kept in sync with the jobs table by triggers.
+        """
+        self._conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+                title, location, company, description,
+                tokenize = 'unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+                INSERT INTO jobs_fts (rowid, title, location, company, description)
+                VALUES (new.rowid, new.title, new.location, new.company, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+                DELETE FROM jobs_fts WHERE rowid = old.rowid;
+            END;
+        """)
+
+    # -------------------- WRITES --------------------
+    def apply_board(self, company, slug, raw_jobs, etag=None, last_modified=None):
+        """
+        Merges a freshly fetched board into the index. Only jobs whose
+        updated_at changed are rewritten; jobs gone from the board are removed.
+        Returns (added_or_updated, removed).
+        """
+        now = time.time()
+        with self._lock:
+            known = dict(self._conn.execute(
+                "SELECT job_id, updated_at FROM jobs WHERE board = ?", (slug,)
+            ).fetchall())
+
+            changed = []
+            seen = set()
+            for job in raw_jobs:
+                job_id = str(job["id"])
+                seen.add(job_id)
+                updated_at = job.get("updated_at")
+                if job_id in known and known[job_id] == updated_at:
+                    continue
+                content = job.get("content", "")
+                changed.append((
+                    slug, job_id, company, job["title"],
+                    job["location"]["name"] if job.get("location") else "Remote",
+                    # The board's company intro/outro would be shared by every posting
+                    # and swamp search, ranking and dedup.
+                    content, html_to_text(content, drop_boilerplate=True),
+                    job.get("absolute_url"), updated_at, now,
+                ))
+            removed = [(slug, job_id) for job_id in known if job_id not in seen]
+
+            self._conn.execute("BEGIN")
+            try:
+                # Explicit delete + insert (not REPLACE) so the search triggers fire.
+                self._conn.executemany(
+                    "DELETE FROM jobs WHERE board = ? AND job_id = ?",
+                    removed + [row[:2] for row in changed],
+                )
+                self._conn.executemany(
+                    "INSERT INTO jobs "
+                    "(board, job_id, company, title, location, content, description, link, updated_at, fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    changed,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO boards (board, company, refreshed_at, error, etag, last_modified) "
+                    "VALUES (?, ?, ?, NULL, ?, ?)",
+                    (slug, company, now, etag, last_modified),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(changed), len(removed)
+
+    def mark_fresh(self, slug):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE boards SET refreshed_at = ?, error = NULL WHERE board = ?", (time.time(), slug)
+            )
+
+    def record_error(self, company, slug, error):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO boards (board, company, refreshed_at, error) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(board) DO UPDATE SET refreshed_at = excluded.refreshed_at, error = excluded.error",
+                (slug, company, time.time(), str(error)),
+            )
+
+    # -------------------- REFRESH --------------------
+    def is_stale(self, slug, max_age=REFRESH_INTERVAL):
+        with self._lock:
+            row = self._conn.execute("SELECT refreshed_at FROM boards WHERE board = ?", (slug,)).fetchone()
+        return not row or row[0] is None or time.time() - row[0] >= max_age
+
+    def validators(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT board, etag, last_modified FROM boards").fetchall()
+        return {board: (etag, last_modified) for board, etag, last_modified in rows}
+
+    def refresh(self, companies, max_age=REFRESH_INTERVAL):
+        """
+        Refreshes every board in companies ({name: slug}) that no process has
+        refreshed within max_age seconds. Boards are fetched concurrently with
+        conditional requests, so unchanged boards cost a 304 and no writes.
+        """
+        stale = {slug: company for company, slug in companies.items() if self.is_stale(slug, max_age)}
+        if not stale:
+            return []
+
+        with metrics.timer("job_index_refresh"):
+            results = fetch_greenhouse_boards(stale, validators=self.validators())
+        for result in results:
+            company = stale[result.slug]
+            if result.error is not None:
+                self.record_error(company, result.slug, result.error.message)
+            elif result.not_modified:
+                self.mark_fresh(result.slug)
+            else:
+                try:
+                    self.apply_board(company, result.slug, result.jobs, result.etag, result.last_modified)
+                except Exception as e:
+                    self.record_error(company, result.slug, e)
+        return results
+
+    def board_errors(self):
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT company, error FROM boards WHERE error IS NOT NULL"
+            ).fetchall())
+
+    def start_background_refresh(self, companies, interval=REFRESH_INTERVAL):
+        """
+        Starts the refresh thread for this process. Calling it again (e.g. on
+        every Streamlit rerun) is a no-op while the thread is alive.
+        """
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            companies = dict(companies)
+
+            def loop():
+                while not self._stop.is_set():
+                    self.refresh(companies, max_age=interval)
+                    self._stop.wait(interval)
+
+            self._stop.clear()
+            self._refresher = threading.Thread(target=loop, name="job-index-refresh", daemon=True)
+            self._refresher.start()
+
+    def stop_background_refresh(self):
+        self._stop.set()
+
+    # -------------------- READS --------------------
+    def _search_sql(self, columns, query, companies, locations):
+        """
+        Returns (sql, params, ranked) selecting columns from the jobs that
+        match the query terms and facet filters.
+        """
+        terms = _QUERY_TERM_RE.findall(query or "")
+        clauses, params = [], []
+        if terms:
+            # Every term must match; the last one also matches as a prefix.
+            match = " AND ".join(f'"{term}"' for term in terms[:-1])
+            match = (match + " AND " if match else "") + f'"{terms[-1]}"*'
+            sql = f"SELECT {columns} FROM jobs_fts JOIN jobs ON jobs.rowid = jobs_fts.rowid"
+            clauses.append("jobs_fts MATCH ?")
+            params.append(match)
+        else:
+            sql = f"SELECT {columns} FROM jobs"
+        if companies:
+            clauses.append(f"jobs.company IN ({', '.join('?' * len(companies))})")
+            params.extend(companies)
+        if locations:
+            clauses.append(f"jobs.location IN ({', '.join('?' * len(locations))})")
+            params.extend(locations)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return sql, params, bool(terms)
+
+    def search_keys(self, query="", companies=None, locations=None, limit=SEARCH_LIMIT):
+        """
+        Ranked multi-term search over title, location, company and the
+        cleaned description. Title matches weigh the most. Without a query the
+        newest postings matching the filters are returned. Returns (rowid,
+        fetched_at) keys; records are resolved through the job store.
+        """
+        sql, params, ranked = self._search_sql("jobs.rowid, jobs.fetched_at", query, companies, locations)
+        if ranked:
+            sql += " ORDER BY bm25(jobs_fts, 10.0, 2.0, 2.0, 1.0)"
+        else:
+            sql += " ORDER BY jobs.updated_at DESC"
+        sql += " LIMIT ?"
+        with self._lock:
+            return self._conn.execute(sql, params + [limit]).fetchall()
+
+    def get_rows(self, rowids):
+        """
+        Returns (rowid, fetched_at, company, title, location, link,
+        description) for the given rowids that still exist, in no set order.
+        """
+        rows = []
+        rowids = list(rowids)
+        # Chunked to stay under SQLite's bound-parameter limit.
+        for start in range(0, len(rowids), 500):
+            chunk = rowids[start:start + 500]
+            with self._lock:
+                rows.extend(self._conn.execute(
+                    "SELECT rowid, fetched_at, company, title, location, link, description FROM jobs "
+                    f"WHERE rowid IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+        return rows
+
+    def facet_counts(self, field, query="", companies=None, locations=None):
+        """
+        Number of matching jobs per company or location, for filter widgets.
+        """
+        if field not in FACET_FIELDS:
+            raise ValueError(f"Unknown facet: {field}")
+        sql, params, _ = self._search_sql(f"jobs.{field}, COUNT(*)", query, companies, locations)
+        sql += f" GROUP BY jobs.{field} ORDER BY COUNT(*) DESC"
+        with self._lock:
+            return dict(self._conn.execute(sql, params).fetchall())
+
+    def version(self):
+        """
+        Changes whenever jobs are added, updated or removed; used to know
+        when derived structures (e.g. the ranking matrix) must be rebuilt.
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*), MAX(fetched_at), SUM(rowid) FROM jobs").fetchone()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _collect_index_stats():
+    return [] if _index is None else [("job_index_jobs", _index.count(), {})]
+
+
+metrics.register_collector(_collect_index_stats)
+
+
+def get_job_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = JobIndex()
+    return _index
@@ -0,0 +1,105 @@
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from utils import http_client, metrics
+from utils.concurrency import run_concurrently
+from utils.job_scraper.common import GREENHOUSE_API_BASE, ScraperError, extract_job_description
+
+BOARD_MAX_WORKERS = 16        # global cap on concurrent board/page fetches
+GREENHOUSE_RATE_LIMIT = 5     # requests per second per host
+DESCRIPTION_RATE_LIMIT = 2    # requests per second per job page host
+
+http_client.set_rate_limit(urlsplit(GREENHOUSE_API_BASE).hostname, GREENHOUSE_RATE_LIMIT)
+
+
+@dataclass
+class BoardResult:
+    """
+    Outcome of fetching one board. When not_modified is set the board is
+    unchanged since the validators that were sent and jobs is empty.
+    """
+    slug: str
+    jobs: list = field(default_factory=list)
+    etag: str = None
+    last_modified: str = None
+    not_modified: bool = False
+    error: ScraperError = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+@metrics.traced("scraper_board")
+def fetch_board(slug, etag=None, last_modified=None):
+    """
+    Conditionally fetches one Greenhouse board with ETag / If-Modified-Since.
+    Never raises; failures are reported in BoardResult.error.
+    """
+    url = f"{GREENHOUSE_API_BASE}/{slug}/jobs?content=true"
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    try:
+        response = http_client.get(url, headers=headers)
+    except Exception as e:
+        return BoardResult(slug, error=ScraperError(slug, str(e)))
+
+    metrics.inc("scraper_board_responses_total", status=response.status_code)
+    if response.status_code == 304:
+        return BoardResult(slug, etag=etag, last_modified=last_modified, not_modified=True)
+    if response.status_code != 200:
+        return BoardResult(slug, error=ScraperError(slug, f"HTTP {response.status_code}", status=response.status_code))
+
+    try:
+        jobs = response.json().get("jobs", [])
+    except ValueError as e:
+        return BoardResult(slug, error=ScraperError(slug, f"Invalid JSON: {e}", status=response.status_code))
+
+    return BoardResult(
+        slug,
+        jobs=jobs,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+    )
+
+
+def fetch_greenhouse_boards(slugs, validators=None, with_descriptions=False, max_workers=BOARD_MAX_WORKERS):
+    """
+    Fetches many Greenhouse boards concurrently.
+
+    validators maps slug -> (etag, last_modified) from a previous run so
+    unchanged boards come back as not_modified. With with_descriptions set,
+    every job also gets a "description" scraped from its page, or a
+    "description_error" ScraperError. Returns BoardResults in input order.
+    """
+    validators = validators or {}
+    slugs = list(slugs)
+
+    results = [
+        result if result is not None else BoardResult(slug, error=ScraperError(slug, str(error)))
+        for slug, (result, error) in zip(slugs, run_concurrently(
+            lambda slug: fetch_board(slug, *validators.get(slug, (None, None))),
+            slugs,
+            max_workers=max_workers,
+        ))
+    ]
+
+    if with_descriptions:
+        jobs = [job for result in results if result.ok for job in result.jobs if job.get("absolute_url")]
+        for host in {urlsplit(job["absolute_url"]).hostname for job in jobs}:
+            if not http_client.has_rate_limit(host):
+                http_client.set_rate_limit(host, DESCRIPTION_RATE_LIMIT)
+        described = run_concurrently(
+            lambda job: extract_job_description(job["absolute_url"]), jobs, max_workers=max_workers
+        )
+        for job, (description, error) in zip(jobs, described):
+            if error is None:
+                job["description"] = description
+            else:
+                job["description_error"] = error if isinstance(error, ScraperError) else ScraperError(job["absolute_url"], str(error))
+
+    return results
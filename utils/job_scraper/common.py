@@ -1,53 +1,48 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 
-def fetch_greenhouse_jobs(company_slug, limit=10, keyword=None):
-    try:
-        url = f"https://boards-api.greenhouse.io/v1/boards/{company_slug}/jobs?content=true"
-        res = requests.get(url, timeout=10)
-        res.raise_for_status()
-        data = res.json()
-
-        jobs = []
-        for job in data.get("jobs", []):
-            title = job["title"]
-            if keyword and keyword.lower() not in title.lower():
-                continue
-
-            jobs.append({
-                "title": title,
-                "location": job["location"]["name"] if job.get("location") else "Remote",
-                "company": company_slug.capitalize(),
-                "summary": job.get("content", "")[:500],  # Short summary
-                "link": job["absolute_url"]
-            })
-
-            if len(jobs) >= limit:
-                break
-
-        return jobs
+from utils import http_client, metrics
 
-    except Exception as e:
-        return f"❌ Error fetching jobs for {company_slug}: {e}"
+GREENHOUSE_API_BASE = os.environ.get("GREENHOUSE_API_BASE", "https://boards-api.greenhouse.io/v1/boards")
 
 
-def fetch_full_job_description(url):
+class ScraperError(Exception):
+    """
+    A failed board or job page fetch. source is the board slug or URL,
+    status the HTTP status code when the server answered.
     """
-    Fetches the full job description HTML and extracts visible text.
+
+    def __init__(self, source, message, status=None):
+        super().__init__(f"{source}: {message}")
+        self.source = source
+        self.message = message
+        self.status = status
+
+
+@metrics.traced("scraper_job_page")
+def extract_job_description(url):
+    """
+    Fetches the job page and returns its visible description text.
+    Raises ScraperError on failure.
     """
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        response = http_client.get(url)
+    except Exception as e:
+        raise ScraperError(url, str(e)) from e
+    if response.status_code != 200:
+        raise ScraperError(url, f"HTTP {response.status_code}", status=response.status_code)
 
-        # Look for job description in typical container
-        job_section = soup.find("div", {"id": "content"})
+    from bs4 import BeautifulSoup
 
-        if not job_section:
-            job_section = soup.find("section") or soup.find("article") or soup
+    soup = BeautifulSoup(response.text, 'html.parser')
 
-        full_text = job_section.get_text(separator="\n").strip()
-        return full_text if full_text else "Full job description could not be extracted."
+    # Look for job description in typical container
+    job_section = soup.find("div", {"id": "content"})
+
+    if not job_section:
+        job_section = soup.find("section") or soup.find("article") or soup
+
+    full_text = job_section.get_text(separator="\n").strip()
+    if not full_text:
+        raise ScraperError(url, "Full job description could not be extracted.")
+    return full_text
 
-    except Exception as e:
-        return f"❌ Error fetching full job description: {e}"
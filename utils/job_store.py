@@ -0,0 +1,151 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from utils import metrics
+from utils.job_index import SEARCH_LIMIT, get_job_index
+
+JOB_STORE_MAX_MB = float(os.environ.get("LAZYAPPLY_JOB_STORE_MB", 64))   # cap on cached record text
+SCAN_CHUNK = 500   # rows loaded per query when scanning the whole index
+
+
+@dataclass(frozen=True, slots=True)
+class JobRecord:
+    """
+    One indexed posting. company and location are interned: a handful of
+    distinct values shared by every record instead of a copy per job.
+    """
+    key: int            # jobs.rowid
+    fetched_at: float   # changes whenever the row is rewritten
+    company: str
+    title: str
+    location: str
+    link: str
+    description: str
+
+    @classmethod
+    def from_row(cls, row):
+        rowid, fetched_at, company, title, location, link, description = row
+        return cls(
+            rowid, fetched_at, sys.intern(company), title, sys.intern(location or "Remote"),
+            link or "", description or "",
+        )
+
+    def size(self):
+        """Approximate bytes owned by this record (interned strings are shared, so not counted)."""
+        return sys.getsizeof(self) + sum(sys.getsizeof(s) for s in (self.title, self.link, self.description))
+
+
+class JobStore:
+    """
+    Process-wide, memory-capped cache of JobRecords in front of the job
+    index. Sessions and the ranker keep (rowid, fetched_at) keys and look
+    records up here, so a posting is held once however many sessions show
+    it. Least recently used records are dropped beyond max_bytes.
+    """
+
+    def __init__(self, index, max_bytes=int(JOB_STORE_MAX_MB * 1024 * 1024)):
+        self.index = index
+        self.max_bytes = max_bytes
+        self._records = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """
+        Returns the records for keys ([(rowid, fetched_at)]) in the same
+        order. Rows removed from the index since the keys were read are skipped.
+        """
+        keys = list(keys)
+        found, missing = {}, []
+        with self._lock:
+            for rowid, fetched_at in keys:
+                record = self._records.get(rowid)
+                if record is not None and record.fetched_at == fetched_at:
+                    self._records.move_to_end(rowid)
+                    found[rowid] = record
+                else:
+                    missing.append(rowid)
+        metrics.inc("job_store_lookups_total", len(found), result="hit")
+        metrics.inc("job_store_lookups_total", len(missing), result="miss")
+
+        if missing:
+            loaded = [JobRecord.from_row(row) for row in self.index.get_rows(missing)]
+            with self._lock:
+                for record in loaded:
+                    self._add(record)
+                    found[record.key] = record
+                self._evict()
+        return [found[rowid] for rowid, _ in keys if rowid in found]
+
+    def search(self, query="", companies=None, locations=None, limit=SEARCH_LIMIT):
+        """JobIndex.search_keys() resolved to shared records, best match first."""
+        return self.get_many(self.index.search_keys(query, companies, locations, limit))
+
+    def all_keys(self):
+        return self.index.search_keys(limit=-1)
+
+    def scan(self, keys, chunk_size=SCAN_CHUNK):
+        """
+        Yields records for keys in order without caching the ones not already
+        cached, so a full pass (e.g. building the ranker) does not flush the
+        records sessions are using.
+        """
+        keys = list(keys)
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            with self._lock:
+                cached = {
+                    rowid: record for rowid, fetched_at in chunk
+                    if (record := self._records.get(rowid)) is not None and record.fetched_at == fetched_at
+                }
+            rows = self.index.get_rows([rowid for rowid, _ in chunk if rowid not in cached])
+            cached.update((row[0], JobRecord.from_row(row)) for row in rows)
+            yield from (cached[rowid] for rowid, _ in chunk if rowid in cached)
+
+    def stats(self):
+        with self._lock:
+            return {"records": len(self._records), "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._bytes = 0
+
+    def _add(self, record):
+        previous = self._records.pop(record.key, None)
+        if previous is not None:
+            self._bytes -= previous.size()
+        self._records[record.key] = record
+        self._bytes += record.size()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._records:
+            _, record = self._records.popitem(last=False)
+            self._bytes -= record.size()
+            metrics.inc("job_store_evictions_total")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _collect_store_stats():
+    if _store is None:
+        return []
+    stats = _store.stats()
+    return [("job_store_records", stats["records"], {}), ("job_store_bytes", stats["bytes"], {})]
+
+
+metrics.register_collector(_collect_store_stats)
+
+
+def get_job_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore(get_job_index())
+    return _store
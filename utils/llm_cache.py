@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils import metrics
+from utils.db import connect
+
+CACHE_PATH = os.environ.get("LAZYAPPLY_CACHE_DB", os.path.join(".cache", "llm_cache.sqlite3"))
+CACHE_TTL = 7 * 24 * 3600          # seconds
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+CACHE_MAX_ENTRIES = 50_000
+EXPIRE_EVERY = 500                 # writes between sweeps for expired entries
+
+
+def make_cache_key(model, temperature, system_prompt, prompt, max_tokens=None):
+    """
+    Stable digest of everything that determines a completion. Unlike hash(),
+    this is identical across processes and restarts.
+    """
+    material = json.dumps(
+        [model, temperature, system_prompt, prompt, max_tokens],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._writes = 0
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                response TEXT NOT NULL
+            );
+            DROP INDEX IF EXISTS idx_responses_accessed;
+            CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses (accessed_at, size, key);
+            CREATE INDEX IF NOT EXISTS idx_responses_created ON responses (created_at);
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self._init_totals()
+
+    def _init_totals(self):
+        """
+        Keeps entries/bytes as running totals in the stats table, maintained
+        by triggers, so set() and stats() never scan responses. A cache file
+        from before the triggers existed is counted once here.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in (
+                """CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+                       UPDATE stats SET value = value + 1 WHERE name = 'entries';
+                       UPDATE stats SET value = value + new.size WHERE name = 'bytes';
+                   END""",
+                """CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+                       UPDATE stats SET value = value - 1 WHERE name = 'entries';
+                       UPDATE stats SET value = value - old.size WHERE name = 'bytes';
+                   END""",
+                """CREATE TRIGGER IF NOT EXISTS responses_resize AFTER UPDATE OF size ON responses BEGIN
+                       UPDATE stats SET value = value + new.size - old.size WHERE name = 'bytes';
+                   END""",
+            ):
+                self._conn.execute(statement)
+            if not self._conn.execute("SELECT 1 FROM stats WHERE name = 'entries'").fetchone():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO stats (name, value) "
+                    "SELECT 'entries', COUNT(*) FROM responses UNION ALL "
+                    "SELECT 'bytes', COALESCE(SUM(size), 0) FROM responses"
+                )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _totals(self):
+        totals = dict(self._conn.execute(
+            "SELECT name, value FROM stats WHERE name IN ('entries', 'bytes')"
+        ).fetchall())
+        return totals.get("entries", 0), totals.get("bytes", 0)
+
+    def _bump(self, name, amount=1):
+        self._conn.execute(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self._bump("misses")
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._bump("hits")
+            return row[0]
+
+    def contains(self, key):
+        """True if a live entry exists; unlike get() it counts no hit or miss."""
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and not (self.ttl and time.time() - row[0] > self.ttl)
+
+    def set(self, key, response, model=None):
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit
+            # delete does not fire the delete trigger, which would skew the totals.
+            self._conn.execute(
+                "INSERT INTO responses (key, model, size, created_at, accessed_at, response) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET model = excluded.model, size = excluded.size, "
+                "created_at = excluded.created_at, accessed_at = excluded.accessed_at, "
+                "response = excluded.response",
+                (key, model, size, now, now, response),
+            )
+            self._evict()
+            self._writes += 1
+
+    def _evict(self):
+        # get() already ignores expired rows, so sweeping them is only housekeeping.
+        if self.ttl and self._writes % EXPIRE_EVERY == 0:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+
+        count, total = self._totals()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until both limits hold again.
+        evict_keys = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evict_keys.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evict_keys)
+        self._bump("evictions", len(evict_keys))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "evictions": counters.get("evictions", 0),
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": counters.get("entries", 0),
+            "bytes": counters.get("bytes", 0),
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _collect_cache_stats():
+    if _cache is None:
+        return []
+    stats = _cache.stats()
+    return [(f"llm_cache_{name}", value, {}) for name, value in stats.items()]
+
+
+metrics.register_collector(_collect_cache_stats)
+
+
+def get_response_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -1,51 +1,240 @@
-import streamlit as st
-import requests
+import json
+import logging
+import os
 import re
+import threading
+import time
+import requests
+from utils import config, http_client, metrics
+from utils.concurrency import run_concurrently
+from utils.llm_cache import get_response_cache, make_cache_key
 
-TOGETHER_API_KEY = st.secrets["together"]["api_key"]
-
-headers = {
-    "Authorization": f"Bearer {TOGETHER_API_KEY}",
-    "Content-Type": "application/json"
-}
+logger = logging.getLogger(__name__)
 
 MAIN_MODEL = "lgai/exaone-3-5-32b-instruct"
 LIGHT_MODEL = "mistralai/Mistral-7B-Instruct-v0.2"
-API_URL = "https://api.together.xyz/v1/chat/completions"
+AUTO_MODEL = "auto"   # let utils.model_router pick, hedge and fall back
+DEFAULT_API_URL = "https://api.together.xyz/v1/chat/completions"
+
+REQUEST_TIMEOUT = 60      # seconds per API call
+BATCH_MAX_WORKERS = 8     # concurrent API calls per batch
+MAX_TOKENS = 2048
+# Process-wide cap on requests in flight to the API, across sessions and queued jobs.
+MAX_OUTSTANDING_CALLS = int(os.environ.get("LAZYAPPLY_MAX_API_CALLS", 16))
+SYSTEM_PROMPT = "You are a helpful resume evaluator AI assistant."
+API_ERROR_TEXT = "⚠️ API error or no result."
 
-def call_together_api(prompt, model=MAIN_MODEL, temperature=0.7):
+# Input tokens allowed for resume + JD text per prompt, per model.
+MODEL_INPUT_TOKENS = {
+    MAIN_MODEL: 6000,
+    LIGHT_MODEL: 3000,
+}
+DEFAULT_INPUT_TOKENS = 4000
+
+def input_token_budget(model):
+    return MODEL_INPUT_TOKENS.get(model, DEFAULT_INPUT_TOKENS)
+
+def _build_payload(prompt, model, temperature, stream=False):
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "You are a helpful resume evaluator AI assistant."},
+            {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt}
         ],
-        "max_tokens": 2048,
+        "max_tokens": MAX_TOKENS,
         "temperature": temperature
     }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+_client = None
+
+def _get_client():
+    """
+    (api_url, headers), resolved from utils.config on first use rather than
+    at import, so importing this module needs neither Streamlit nor an API key.
+    """
+    global _client
+    if _client is None:
+        _client = (
+            config.get_setting("together_api_url", DEFAULT_API_URL),
+            {
+                "Authorization": f"Bearer {config.get_setting('together_api_key')}",
+                "Content-Type": "application/json",
+            },
+        )
+    return _client
 
-    response = requests.post(API_URL, headers=headers, json=payload)
+def _reset_client():
+    global _client
+    _client = None
 
-    if response.status_code == 200:
-        return response.json()["choices"][0]["message"]["content"].strip()
+config.on_change(_reset_client)
+
+class TogetherAPIError(Exception):
+    def __init__(self, status, body):
+        super().__init__(f"[API Error {status}]: {body}")
+        self.status = status
+        self.body = body
+
+class StreamInterrupted(Exception):
+    """The server closed a stream before saying it was finished."""
+
+_api_slots = threading.BoundedSemaphore(MAX_OUTSTANDING_CALLS)
+
+def _record_usage(usage, model):
+    if not usage:
+        return
+    for kind in ("prompt", "completion"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            metrics.inc("llm_tokens_total", tokens, model=model, kind=kind)
+
+def complete(prompt, model=MAIN_MODEL, temperature=0.7, timeout=REQUEST_TIMEOUT, use_cache=True):
+    """
+    Cached chat completion that raises instead of reporting to the UI:
+    TogetherAPIError for API errors, requests exceptions for network ones.
+    """
+    cache_key = make_cache_key(model, temperature, SYSTEM_PROMPT, prompt, MAX_TOKENS)
+    if use_cache:
+        cached = get_response_cache().get(cache_key)
+        metrics.inc("llm_cache_lookups_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+
+    api_url, headers = _get_client()
+    payload = _build_payload(prompt, model, temperature)
+    with _api_slots, metrics.timer("llm_request", model=model):
+        response = http_client.post(
+            api_url, headers=headers, json=payload, timeout=(http_client.CONNECT_TIMEOUT, timeout)
+        )
+        if response.status_code != 200:
+            raise TogetherAPIError(response.status_code, response.text)
+        data = response.json()
+
+    _record_usage(data.get("usage"), model)
+    result = data["choices"][0]["message"]["content"].strip()
+    if use_cache and result:
+        get_response_cache().set(cache_key, result, model=model)
+    return result
+
+def _report_error(error, on_error):
+    if on_error is not None:
+        on_error(error)
     else:
-        st.error(f"[API Error {response.status_code}]: {response.text}")
+        logger.error("%s", error)
+
+def call_together_api(prompt, model=MAIN_MODEL, temperature=0.7, timeout=REQUEST_TIMEOUT, use_cache=True,
+                      on_error=None):
+    """
+    Like complete(), but returns None on API, network and missing-config
+    errors after passing the error to on_error (logged when not given).
+    """
+    try:
+        return complete(prompt, model=model, temperature=temperature, timeout=timeout, use_cache=use_cache)
+    except (TogetherAPIError, requests.RequestException, config.ConfigError) as e:
+        _report_error(e, on_error)
         return None
 
+def stream_together_api(prompt, model=MAIN_MODEL, temperature=0.7, timeout=REQUEST_TIMEOUT, use_cache=True,
+                        on_error=None):
+    """
+    Yields completion tokens as the server produces them (server-sent events).
+    A cache hit is yielded as a single chunk; the full text is cached once the
+    stream finishes. API, network and missing-config errors go to on_error
+    (logged when not given) and end the stream, as does StreamInterrupted when
+    the connection closes early: the tokens yielded so far are then an
+    incomplete answer, so callers that need to know pass on_error.
+    """
+    cache_key = make_cache_key(model, temperature, SYSTEM_PROMPT, prompt, MAX_TOKENS)
+    if use_cache:
+        cached = get_response_cache().get(cache_key)
+        metrics.inc("llm_cache_lookups_total", result="miss" if cached is None else "hit")
+        if cached is not None:
+            yield cached
+            return
+
+    try:
+        api_url, headers = _get_client()
+    except config.ConfigError as e:
+        _report_error(e, on_error)
+        return
+    payload = _build_payload(prompt, model, temperature, stream=True)
+    started = time.perf_counter()
+    try:
+        with _api_slots:
+            with metrics.timer("llm_stream_connect", model=model):
+                response = http_client.post(
+                    api_url, headers=headers, json=payload, stream=True,
+                    timeout=(http_client.CONNECT_TIMEOUT, timeout)
+                )
+
+            if response.status_code != 200:
+                metrics.inc("llm_stream_errors_total", model=model, status=response.status_code)
+                _report_error(TogetherAPIError(response.status_code, response.text), on_error)
+                return
+
+            chunks = []
+            usage = None
+            finished = False
+            with response:
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        finished = True
+                        break
+                    try:
+                        event = json.loads(data)
+                    except ValueError:
+                        continue
+                    usage = event.get("usage") or usage
+                    choices = event.get("choices") or [{}]
+                    finished = finished or bool(choices[0].get("finish_reason"))
+                    token = (choices[0].get("delta") or {}).get("content")
+                    if token:
+                        if not chunks:
+                            metrics.observe(
+                                "llm_time_to_first_token_seconds", time.perf_counter() - started, model=model
+                            )
+                        chunks.append(token)
+                        yield token
+    except requests.RequestException as e:
+        metrics.inc("llm_stream_errors_total", model=model, status=type(e).__name__)
+        _report_error(e, on_error)
+        return
+    if not finished:
+        metrics.inc("llm_stream_errors_total", model=model, status="interrupted")
+        _report_error(StreamInterrupted(f"stream from {model} ended after {len(chunks)} tokens"), on_error)
+        return
+
+    metrics.observe("llm_stream_seconds", time.perf_counter() - started, model=model)
+    _record_usage(usage, model)
+    result = "".join(chunks).strip()
+    if use_cache and result:
+        get_response_cache().set(cache_key, result, model=model)
+
+SCORE_PATTERNS = [
+    re.compile(r"\b(\d{1,3})\s*out\s*of\s*100\b", re.IGNORECASE),
+    re.compile(r"\b(\d{1,3})\s*/\s*100\b"),
+    re.compile(r"\bscore\b(?:\s*out\s*of\s*100)?\s*(?:is|of)?\s*[:=\-]?\s*\**\s*(\d{1,3})\b(?!\s*(?:/|out\s*of)\s*10\b)", re.IGNORECASE),
+]
+
 def extract_score(text):
     if not text:
         return None
-    match = re.search(r"\b(\d{2,3})\s*out\s*of\s*100\b", text, re.IGNORECASE)
-    if match:
-        try:
+    for pattern in SCORE_PATTERNS:
+        for match in pattern.finditer(text):
             score = int(match.group(1))
             if 0 <= score <= 100:
                 return score
-        except ValueError:
-            return None
     return None
 
 def get_match_feedback(resume_text, jd_text):
+    from utils.prompt_templates import compact_prompt_inputs
+    resume_text, jd_text = compact_prompt_inputs(resume_text, jd_text, input_token_budget(MAIN_MODEL))
     prompt = f"""
 You are a resume evaluator AI.
 Compare the following resume with the job description and return:
@@ -65,12 +254,16 @@ Job Description:
         score = extract_score(result)
         return result, score
     else:
-        return "⚠️ API error or no result.", None
+        return API_ERROR_TEXT, None
 
-def get_batched_match_feedback(resume_text, jd_list):
-    results = []
-    for jd_text in jd_list:
-        prompt = f"""
+def score_match(resume_text, jd_text, model=LIGHT_MODEL, timeout=REQUEST_TIMEOUT):
+    """
+    Short-form resume/JD comparison used for bulk scoring. Returns the raw
+    completion, or None on API error.
+    """
+    from utils.prompt_templates import compact_prompt_inputs
+    resume_text, jd_text = compact_prompt_inputs(resume_text, jd_text, input_token_budget(model))
+    prompt = f"""
 Compare the following resume with the job summary.
 Return a brief reasoning and a match score out of 100.
 
@@ -80,24 +273,290 @@ Resume:
 Job Summary:
 {jd_text}
 """
-        result = call_together_api(prompt, model=LIGHT_MODEL)
-        if result:
-            score = extract_score(result)
-            results.append((result, score))
-        else:
-            results.append(("⚠️ API error or no result.", None))
+    return call_together_api(prompt, model=model, timeout=timeout)
+
+def _score_unique(jd_list, score_all):
+    """
+    Runs score_all on one representative per cluster of near-duplicate JDs
+    with the same title and gives every duplicate its representative's result.
+    """
+    from utils.dedup import cluster_representatives
+    from utils.prompt_templates import extract_job_title
+
+    jd_list = list(jd_list)
+    representatives = cluster_representatives(
+        jd_list, groups=[extract_job_title(jd) for jd in jd_list]
+    ) if len(jd_list) > 1 else list(range(len(jd_list)))
+    unique = sorted(set(representatives))
+    if len(unique) == len(jd_list):
+        return score_all(jd_list)
+    metrics.inc("llm_duplicate_jds_total", len(jd_list) - len(unique))
+    scored = dict(zip(unique, score_all([jd_list[i] for i in unique])))
+    return [scored[representative] for representative in representatives]
+
+def get_batched_match_feedback(resume_text, jd_list, max_workers=BATCH_MAX_WORKERS,
+                               timeout=REQUEST_TIMEOUT, batch_timeout=None, dedupe=True, model=LIGHT_MODEL):
+    """
+    Scores the resume against every JD concurrently. With dedupe, near-
+    duplicate JDs are scored once and share the result.
+    Returns (feedback, score) in input order.
+    """
+    def score_one(jd_text):
+        return score_match(resume_text, jd_text, model=model, timeout=timeout)
+
+    def score_all(jds):
+        results = []
+        for result, error in run_concurrently(score_one, jds, max_workers=max_workers, timeout=batch_timeout):
+            if result:
+                results.append((result, extract_score(result)))
+            else:
+                results.append((API_ERROR_TEXT, None))
+        return results
+
+    return _score_unique(jd_list, score_all) if dedupe else score_all(list(jd_list))
+
+PACK_SIZE = 5   # JDs per packed request
+
+def _packed_prompt(resume_text, jd_texts):
+    jobs = "\n\n".join(f"### Job {i}\n{jd}" for i, jd in enumerate(jd_texts, start=1))
+    return f"""
+Compare the following resume with each of the {len(jd_texts)} job descriptions below.
+Score every job independently and brutally honestly.
+
+Respond with ONLY a JSON array, no prose and no code fences, with exactly one object per job:
+[{{"job": <job number>, "score": <integer 0-100>, "reasoning": "<2-3 sentences>"}}]
+
+Resume:
+{resume_text}
+
+Job Descriptions:
+{jobs}
+"""
+
+def _json_int(value):
+    """value if it is a whole JSON number (70 or 70.0), else None: no bools, strings or 70.9."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+def parse_packed_scores(text, count):
+    """
+    Parses a packed-batch completion into {job_number: (reasoning, score)}.
+    Items that are missing or fail validation are left out.
+    """
+    if not text:
+        return {}
+    # raw_decode stops at the end of the array, so brackets in prose after
+    # it do not matter; brackets in prose before it ("[1]") are skipped.
+    decoder, items, start = json.JSONDecoder(), [], text.find("[")
+    while start != -1 and not any(isinstance(item, dict) for item in items):
+        try:
+            items, _ = decoder.raw_decode(text, start)
+        except ValueError:
+            pass
+        items = items if isinstance(items, list) else []
+        start = text.find("[", start + 1)
+
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        job, score, reasoning = _json_int(item.get("job")), _json_int(item.get("score")), item.get("reasoning")
+        if job is None or score is None:
+            continue
+        if not 1 <= job <= count or not 0 <= score <= 100 or job in parsed:
+            continue
+        if not isinstance(reasoning, str) or not reasoning.strip():
+            continue
+        parsed[job] = (f"{reasoning.strip()}\n\nMatch Score: {score} out of 100", score)
+    return parsed
+
+def get_packed_match_feedback(resume_text, jd_list, pack_size=PACK_SIZE, model=LIGHT_MODEL,
+                              max_workers=BATCH_MAX_WORKERS, timeout=REQUEST_TIMEOUT, dedupe=True):
+    """
+    Scores pack_size JDs per request with a JSON response schema, so the
+    resume is sent once per pack instead of once per JD. Items a pack fails
+    to score are retried one by one. With dedupe, near-duplicate JDs are
+    scored once. Returns (feedback, score) in input order.
+    """
+    if dedupe:
+        return _score_unique(jd_list, lambda jds: get_packed_match_feedback(
+            resume_text, jds, pack_size, model, max_workers, timeout, dedupe=False
+        ))
+    from utils.prompt_templates import compact_prompt_inputs
+    from utils.text_cleaning import compact_text, estimate_tokens
+
+    jd_list = list(jd_list)
+    budget = input_token_budget(model)
+    resume_text, _ = compact_prompt_inputs(resume_text, None, int(budget * 0.4))
+    jd_budget = max(200, (budget - estimate_tokens(resume_text)) // max(1, min(pack_size, len(jd_list))))
+
+    packs = [list(range(i, min(i + pack_size, len(jd_list)))) for i in range(0, len(jd_list), pack_size)]
+
+    def score_pack(indices):
+        prompt = _packed_prompt(resume_text, [compact_text(jd_list[i], jd_budget) for i in indices])
+        return parse_packed_scores(call_together_api(prompt, model=model, timeout=timeout), len(indices))
+
+    results = [None] * len(jd_list)
+    for indices, (parsed, error) in zip(packs, run_concurrently(score_pack, packs, max_workers=max_workers)):
+        for position, i in enumerate(indices, start=1):
+            if parsed and position in parsed:
+                results[i] = parsed[position]
+
+    retry = [i for i, result in enumerate(results) if result is None]
+    if retry:
+        retried = get_batched_match_feedback(
+            resume_text, [jd_list[i] for i in retry], max_workers=max_workers, timeout=timeout, dedupe=False,
+            model=model,
+        )
+        for i, result in zip(retry, retried):
+            results[i] = result
     return results
 
-def get_custom_prompt_feedback(resume_text, jd_text, mode, section, model=MAIN_MODEL):
+def get_prefiltered_match_feedback(resume_text, ranker, top_k=5, max_workers=BATCH_MAX_WORKERS):
+    """
+    Scores the resume against every job with the local ranker in one batched
+    operation, then sends only the top_k distinct jobs to the LLM. Reposts of
+    a shortlisted job are returned alongside it instead.
+    Returns [(job, similarity, feedback, score, duplicates)], most similar first.
+    """
+    from utils.dedup import collapse_duplicates
+
+    # Over-fetch so collapsing reposts still leaves top_k distinct jobs.
+    ranked = ranker.top_k(resume_text, top_k * 3)
+    shortlist = [
+        (job, similarity, [duplicate for duplicate, _ in duplicates])
+        for (job, similarity), duplicates in collapse_duplicates(
+            ranked, text=lambda pair: pair[0].description, key=lambda pair: (pair[0].title, pair[0].company)
+        )
+    ][:top_k]
+    feedback = get_packed_match_feedback(
+        resume_text, [job.description for job, _, _ in shortlist], max_workers=max_workers, dedupe=False
+    )
+    return [
+        (job, similarity, result, score, duplicates)
+        for (job, similarity, duplicates), (result, score) in zip(shortlist, feedback)
+    ]
+
+def plan_custom_prompt(resume_text, jd_text, mode, section="Entire Resume", model=MAIN_MODEL):
+    """
+    Returns (prompt, primary, backup): what get_custom_prompt_feedback sends
+    for these inputs. backup is None unless model=AUTO_MODEL picked one.
+    """
     from utils.prompt_templates import build_prompt
-    prompt = build_prompt(resume_text, jd_text, mode)
-    result = call_together_api(prompt, model=model)
+
+    primary, backup = model, None
+    if model == AUTO_MODEL:
+        from utils.model_router import get_model_router
+        from utils.text_cleaning import estimate_tokens
+
+        tokens = estimate_tokens(resume_text) + estimate_tokens(jd_text or "")
+        primary, backup = get_model_router().choose(mode, tokens)
+    prompt = build_prompt(resume_text, jd_text, mode, section, token_budget=input_token_budget(primary))
+    return prompt, primary, backup
+
+def is_cached(prompt, model, temperature=0.7):
+    return get_response_cache().contains(make_cache_key(model, temperature, SYSTEM_PROMPT, prompt, MAX_TOKENS))
+
+def _stream_text(prompt, model, on_progress):
+    """
+    Streams prompt to model, passing the text so far to on_progress. Returns
+    the full answer, or None if the stream failed: a partial answer is not one.
+    """
+    errors = []
+    received = ""
+    for token in stream_together_api(prompt, model=model, on_error=errors.append):
+        received += token
+        on_progress(received)
+    if errors:
+        logger.error("Stream from %s failed after %d chars: %s", model, len(received), errors[0])
+        return None
+    return received.strip() or None
+
+def _routed_feedback(resume_text, jd_text, mode, section="Entire Resume", light=False, on_progress=None):
+    from utils.model_router import get_model_router
+
+    router = get_model_router()
+    prompt, primary, backup = plan_custom_prompt(
+        resume_text, jd_text, mode, section, LIGHT_MODEL if light else AUTO_MODEL
+    )
+
+    try:
+        if on_progress is not None:
+            result, _ = router.stream(prompt, primary, backup, on_progress, mode=mode)
+        else:
+            result, _ = router.complete(prompt, primary, backup, mode=mode)
+        return result
+    except Exception as e:
+        logger.error("All models failed: %s", e)
+        return None
+
+def get_custom_prompt_feedback(resume_text, jd_text, mode, section, model=MAIN_MODEL, on_progress=None):
+    """
+    With on_progress set, the completion is streamed and on_progress is called
+    with the text received so far after every token; a stream that breaks off
+    gives (None, None), not the partial text. model=AUTO_MODEL routes the
+    request through the model router.
+    """
+    from utils.prompt_templates import PARALLEL_REPORT_MODE
+    if mode == PARALLEL_REPORT_MODE:
+        return get_parallel_full_report(resume_text, jd_text, model=model, on_progress=on_progress)
+
+    if model == AUTO_MODEL:
+        result = _routed_feedback(resume_text, jd_text, mode, section, on_progress=on_progress)
+        return result, extract_score(result)
+
+    prompt, _, _ = plan_custom_prompt(resume_text, jd_text, mode, section, model)
+    if on_progress is None:
+        result = call_together_api(prompt, model=model)
+    else:
+        result = _stream_text(prompt, model, on_progress)
     score = extract_score(result)
     return result, score
 
 def get_full_resume_analysis(resume_text, jd_text):
     from utils.prompt_templates import build_prompt
-    prompt = build_prompt(resume_text, jd_text, mode="Full Resume Intelligence Report")
+    prompt = build_prompt(
+        resume_text, jd_text, mode="Full Resume Intelligence Report", token_budget=input_token_budget(MAIN_MODEL)
+    )
     result = call_together_api(prompt, model=MAIN_MODEL)
     score = extract_score(result)
     return result, score
+
+def get_parallel_full_report(resume_text, jd_text, model=MAIN_MODEL, max_workers=BATCH_MAX_WORKERS, on_progress=None):
+    """
+    Builds the Full Resume Intelligence Report from independent per-part
+    prompts run concurrently, so no single completion has to fit all ten
+    parts. on_progress receives the report assembled so far as parts finish.
+    """
+    from utils.prompt_templates import build_prompt, REPORT_PARTS
+
+    def run_part(part):
+        heading, part_mode, tier = part
+        if model == AUTO_MODEL:
+            return _routed_feedback(resume_text, jd_text, part_mode, light=tier == "light")
+        part_model = model if tier == "main" else LIGHT_MODEL
+        prompt = build_prompt(resume_text, jd_text, mode=part_mode, token_budget=input_token_budget(part_model))
+        return call_together_api(prompt, model=part_model)
+
+    sections = [None] * len(REPORT_PARTS)
+
+    def assemble():
+        return "\n\n".join(
+            f"## {REPORT_PARTS[i][0]}\n\n{text}" for i, text in enumerate(sections) if text is not None
+        )
+
+    def part_done(i, result, error):
+        sections[i] = result or API_ERROR_TEXT
+        if on_progress is not None:
+            on_progress(assemble())
+
+    run_concurrently(run_part, REPORT_PARTS, max_workers=max_workers, on_result=part_done)
+    # The match score is Role Alignment's; other parts (e.g. the global
+    # benchmark) report scores of their own.
+    alignment = next(i for i, (_, part_mode, _) in enumerate(REPORT_PARTS) if part_mode == "Role Alignment")
+    return assemble(), extract_score(sections[alignment])
@@ -0,0 +1,196 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RECENT_SPANS = 200
+METRICS_PORT = os.environ.get("LAZYAPPLY_METRICS_PORT")
+
+_lock = threading.Lock()
+_counters = {}       # (name, labels) -> value
+_histograms = {}     # (name, labels) -> [bucket counts..., sum, count]
+_collectors = []
+_spans = deque(maxlen=RECENT_SPANS)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram[i] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+
+@contextmanager
+def timer(name, **labels):
+    """
+    Times the block as a span: records the duration in the <name>_seconds
+    histogram, counts failures in <name>_errors_total and keeps the span
+    in the recent-spans buffer.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        inc(f"{name}_errors_total", error=error, **labels)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        observe(f"{name}_seconds", duration, **labels)
+        with _lock:
+            _spans.append({
+                "name": name,
+                "labels": labels,
+                "start": time.time() - duration,
+                "duration": duration,
+                "error": error,
+            })
+
+
+def traced(name, **labels):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def register_collector(collect):
+    """
+    Registers a callable returning [(name, value, labels)] gauges, read at
+    export time (cache sizes, hit ratios, router stats...).
+    """
+    _collectors.append(collect)
+
+
+def _gauges():
+    gauges = []
+    for collect in list(_collectors):
+        try:
+            gauges.extend(collect())
+        except Exception:
+            inc("metrics_collector_errors_total")
+    return gauges
+
+
+def recent_spans(limit=50):
+    with _lock:
+        return list(_spans)[-limit:][::-1]
+
+
+def export_json():
+    with _lock:
+        counters = [{"name": n, "labels": dict(l), "value": v} for (n, l), v in _counters.items()]
+        histograms = [
+            {
+                "name": n,
+                "labels": dict(l),
+                "count": h[-1],
+                "sum": h[-2],
+                "mean": h[-2] / h[-1] if h[-1] else None,
+                "buckets": dict(zip(map(str, LATENCY_BUCKETS), h[:len(LATENCY_BUCKETS)])),
+            }
+            for (n, l), h in _histograms.items()
+        ]
+    gauges = [{"name": n, "labels": labels, "value": v} for n, v, labels in _gauges()]
+    return {"counters": counters, "histograms": histograms, "gauges": gauges}
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def export_prometheus():
+    """
+    Renders every metric in the Prometheus text exposition format.
+    """
+    lines, typed = [], set()
+
+    def header(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items())
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), histogram in histograms:
+        header(name, "histogram")
+        for bound, count in zip(LATENCY_BUCKETS, histogram):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {histogram[-1]}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram[-2]}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram[-1]}")
+    for name, value, labels in sorted(_gauges(), key=lambda g: g[0]):
+        header(name, "gauge")
+        lines.append(f"{name}{_format_labels(sorted(labels.items()))} {value}")
+    return "\n".join(lines) + "\n"
+
+
+_server = None
+
+
+def start_metrics_server(port=None):
+    """
+    Serves /metrics (Prometheus) and /metrics.json from a daemon thread.
+    Safe to call on every Streamlit rerun; only the first call binds.
+    """
+    global _server
+    port = port or METRICS_PORT
+    if _server is not None or not port:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body, content_type = json.dumps(export_json()).encode(), "application/json"
+            elif self.path.startswith("/metrics"):
+                body, content_type = export_prometheus().encode(), "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
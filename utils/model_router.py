@@ -0,0 +1,278 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils import metrics
+from utils.matcher import LIGHT_MODEL, MAIN_MODEL, REQUEST_TIMEOUT, complete, is_cached, stream_together_api
+
+STATS_WINDOW = 50            # recent calls kept per model
+STATS_MAX_AGE = 300          # seconds; older calls are ignored so a model can recover
+MIN_SAMPLES = 5              # calls needed before stats influence routing
+MAX_ERROR_RATE = 0.5         # above this the model is skipped as primary
+DEFAULT_HEDGE_AFTER = 20     # seconds before the backup fires, until p95 is known
+MIN_HEDGE_AFTER = 5
+LARGE_INPUT_TOKENS = 5000    # above this, prefer the light model when main is slow
+LATENCY_SLO = 30             # seconds; target p95 for a single completion
+
+# Modes whose output is short enough that the light model does them well.
+LIGHT_MODES = frozenset({
+    "Generate Professional Summary",
+    "Suggest Resume Format",
+    "Generate Cover Letter",
+})
+
+
+class ModelStats:
+    """
+    Rolling latency and error rate over the last STATS_WINDOW calls made
+    within STATS_MAX_AGE seconds.
+    """
+
+    def __init__(self, window=STATS_WINDOW, max_age=STATS_MAX_AGE):
+        self.max_age = max_age
+        self._calls = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._calls.append((time.monotonic(), latency, ok))
+
+    def snapshot(self):
+        cutoff = time.monotonic() - self.max_age
+        with self._lock:
+            calls = [(latency, ok) for at, latency, ok in self._calls if at >= cutoff]
+        latencies = sorted(latency for latency, ok in calls if ok)
+        errors = sum(1 for _, ok in calls if not ok)
+        return {
+            "calls": len(calls),
+            "error_rate": errors / len(calls) if calls else 0.0,
+            "p50": latencies[len(latencies) // 2] if latencies else None,
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        }
+
+
+class ModelRouter:
+    """
+    Picks a model per request, hedges slow primary calls with a backup on
+    the light model, and falls back automatically when the primary fails.
+    """
+
+    def __init__(self, main_model=MAIN_MODEL, light_model=LIGHT_MODEL, max_workers=16):
+        self.main_model = main_model
+        self.light_model = light_model
+        self.stats = {main_model: ModelStats(), light_model: ModelStats()}
+        # Latency per (model, mode): a full report part and a short summary
+        # take very different times, so hedge deadlines are kept per mode.
+        self.mode_stats = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-router")
+
+    def _healthy(self, model):
+        snapshot = self.stats[model].snapshot()
+        return snapshot["calls"] < MIN_SAMPLES or snapshot["error_rate"] <= MAX_ERROR_RATE
+
+    def choose(self, mode=None, input_tokens=0):
+        """
+        Returns (primary, backup) for a request. backup is None when the
+        primary already is the light model.
+        """
+        main = self.stats[self.main_model].snapshot()
+        prefer_light = (
+            mode in LIGHT_MODES
+            or not self._healthy(self.main_model)
+            or (input_tokens > LARGE_INPUT_TOKENS and main["p95"] is not None and main["p95"] > LATENCY_SLO)
+        )
+        if prefer_light and self._healthy(self.light_model):
+            return self.light_model, None
+        return self.main_model, self.light_model
+
+    def _stats_for(self, model, mode):
+        with self._lock:
+            return self.mode_stats.setdefault((model, mode), ModelStats())
+
+    def record(self, model, latency, ok, mode=None):
+        """Records one real (uncached) call; cache hits must not be recorded."""
+        self.stats[model].record(latency, ok)
+        if mode is not None:
+            self._stats_for(model, mode).record(latency, ok)
+
+    def hedge_after(self, model, mode=None):
+        """
+        p95 latency of model on this mode (or overall without one), or
+        DEFAULT_HEDGE_AFTER until MIN_SAMPLES calls have been seen.
+        """
+        snapshot = (self._stats_for(model, mode) if mode is not None else self.stats[model]).snapshot()
+        if snapshot["calls"] < MIN_SAMPLES or snapshot["p95"] is None:
+            return DEFAULT_HEDGE_AFTER
+        return max(MIN_HEDGE_AFTER, snapshot["p95"])
+
+    def _timed(self, prompt, model, temperature, timeout, mode=None):
+        if is_cached(prompt, model, temperature):
+            # A cache hit takes microseconds and says nothing about the model's latency.
+            return complete(prompt, model=model, temperature=temperature, timeout=timeout)
+        started = time.monotonic()
+        try:
+            result = complete(prompt, model=model, temperature=temperature, timeout=timeout)
+        except Exception:
+            self.record(model, time.monotonic() - started, False, mode)
+            raise
+        self.record(model, time.monotonic() - started, bool(result), mode)
+        if not result:
+            raise ValueError(f"Empty completion from {model}")
+        return result
+
+    def complete(self, prompt, primary, backup=None, temperature=0.7, timeout=REQUEST_TIMEOUT, mode=None):
+        """
+        Runs prompt on primary. If it has not answered within the hedge
+        deadline for mode, or fails, the same prompt goes to backup and the
+        first successful answer wins. Returns (result, model); raises the
+        last error when every model failed.
+        """
+        futures = {self._executor.submit(self._timed, prompt, primary, temperature, timeout, mode): primary}
+        if backup is None or backup == primary:
+            return futures.popitem()[0].result(), primary
+
+        hedged = False
+        deadline = time.monotonic() + self.hedge_after(primary, mode)
+        last_error = None
+        while futures:
+            remaining = None if hedged else max(0, deadline - time.monotonic())
+            done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                model = futures.pop(future)
+                try:
+                    result = future.result()
+                    metrics.inc("router_completions_total", model=model, hedged=hedged)
+                    return result, model
+                except Exception as e:
+                    last_error = e
+            if not hedged and (not done or not futures):
+                # Primary is slow (deadline passed) or failed: fire the backup.
+                metrics.inc("router_backups_total", reason="failure" if done else "hedge")
+                futures[self._executor.submit(self._timed, prompt, backup, temperature, timeout, mode)] = backup
+                hedged = True
+        raise last_error
+
+    def _streamed(self, run, prompt, model, temperature, timeout, mode, events, cancelled):
+        """
+        Streams prompt on model, putting (run, model, text so far, False) on
+        events per token and (run, model, answer or error, True) at the end.
+        Stops reading and closes the stream once cancelled is set.
+        """
+        cached = is_cached(prompt, model, temperature)
+        errors, received = [], ""
+        started = time.monotonic()
+        stream = stream_together_api(
+            prompt, model=model, temperature=temperature, timeout=timeout, on_error=errors.append
+        )
+        try:
+            for token in stream:
+                if cancelled.is_set():
+                    return
+                received += token
+                events.put((run, model, received, False))
+        finally:
+            stream.close()
+        ok = not errors and bool(received.strip())
+        if not cached:
+            self.record(model, time.monotonic() - started, ok, mode)
+        if ok:
+            events.put((run, model, received.strip(), True))
+        else:
+            events.put((run, model, errors[0] if errors else ValueError(f"Empty completion from {model}"), True))
+
+    def stream(self, prompt, primary, backup=None, on_progress=None, temperature=0.7, timeout=REQUEST_TIMEOUT,
+               mode=None):
+        """
+        Streaming complete(). If primary has sent no token within the hedge
+        deadline for mode, backup is streamed too; whichever sends the first
+        token is followed and the other is closed. on_progress gets the
+        followed stream's text so far. A stream that fails, even partway, is
+        no answer, and the other model is tried (again) instead. Returns
+        (result, model); raises the last error when every model failed.
+        """
+        events = queue.Queue()
+        runs = itertools.count()
+        running = {}            # run id -> (model, cancel event)
+        failed = set()
+        models = [primary] + ([backup] if backup and backup != primary else [])
+
+        def launch(model):
+            run, cancelled = next(runs), threading.Event()
+            running[run] = (model, cancelled)
+            self._executor.submit(self._streamed, run, prompt, model, temperature, timeout, mode, events, cancelled)
+
+        launch(primary)
+        leader, hedged, last_error = None, False, None
+        deadline = time.monotonic() + self.hedge_after(primary, mode)
+        while running:
+            waiting = leader is None and not hedged and len(models) > 1
+            try:
+                run, model, payload, finished = events.get(
+                    timeout=max(0, deadline - time.monotonic()) if waiting else None
+                )
+            except queue.Empty:
+                # Primary has sent nothing by the deadline: hedge with the backup.
+                metrics.inc("router_backups_total", reason="hedge")
+                launch(backup)
+                hedged = True
+                continue
+            if run not in running:
+                continue        # a stream already closed
+            if not finished:
+                if leader is None:
+                    leader = run
+                    for other in [other for other in running if other != run]:
+                        running.pop(other)[1].set()
+                if on_progress is not None:
+                    on_progress(payload)
+                continue
+
+            del running[run]
+            if not isinstance(payload, Exception):
+                metrics.inc("router_completions_total", model=model, hedged=hedged)
+                return payload, model
+            last_error = payload
+            failed.add(model)
+            if leader == run:
+                leader = None
+            active = {model for model, _ in running.values()}
+            retry = next((other for other in models if other not in failed and other not in active), None)
+            if retry is not None:
+                metrics.inc("router_backups_total", reason="failure")
+                launch(retry)
+                hedged = True
+        raise last_error
+
+    def snapshot(self):
+        return {model: stats.snapshot() for model, stats in self.stats.items()}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def _collect_router_stats():
+    if _router is None:
+        return []
+    gauges = []
+    for model, snapshot in _router.snapshot().items():
+        for name in ("error_rate", "p50", "p95"):
+            if snapshot[name] is not None:
+                gauges.append((f"router_model_{name}", snapshot[name], {"model": model}))
+    return gauges
+
+
+metrics.register_collector(_collect_router_stats)
+
+
+def get_model_router():
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import deque
+
+from utils import metrics
+from utils.llm_cache import make_cache_key
+from utils.matcher import MAX_TOKENS, SYSTEM_PROMPT, complete, is_cached, plan_custom_prompt
+from utils.task_queue import QUEUED, RUNNING, QueueFull, get_task_queue
+
+PREFETCH_BUDGET = 6          # speculative completions per user per window
+PREFETCH_WINDOW = 60 * 60    # seconds
+PREFETCH_MAX_MODES = 3       # modes prefetched per submission
+PREFETCH_WAIT = 60           # seconds a real request waits for a running prefetch of the same prompt
+
+# Modes users most often try next after each mode.
+NEXT_MODES = {
+    "Brutal Resume Review": (
+        "Rewrite to Sound Results-Driven", "Optimize for ATS", "Generate Professional Summary"),
+    "Rewrite to Sound Results-Driven": (
+        "Optimize for ATS", "Generate Professional Summary", "Tailor Resume for Job Description"),
+    "Optimize for ATS": (
+        "Tailor Resume for Job Description", "Generate Professional Summary", "Generate Cover Letter"),
+    "Generate Professional Summary": (
+        "Generate Cover Letter", "Optimize for ATS", "Suggest Resume Format"),
+    "Tailor Resume for Job Description": (
+        "Generate Cover Letter", "Optimize for ATS", "Generate Professional Summary"),
+    "Top 1% Candidate Benchmarking": (
+        "Tailor Resume for Job Description", "Optimize for ATS", "Generate Cover Letter"),
+    "Generate Cover Letter": (
+        "Tailor Resume for Job Description", "Generate Professional Summary", "Optimize for ATS"),
+    "Suggest Resume Format": (
+        "Optimize for ATS", "Generate Professional Summary", "Rewrite to Sound Results-Driven"),
+}
+DEFAULT_NEXT_MODES = ("Optimize for ATS", "Generate Professional Summary", "Generate Cover Letter")
+
+
+class PrefetchBudget:
+    """
+    Per-user sliding-window allowance of speculative completions, so one
+    user clicking around cannot spend the shared API capacity. Users whose
+    window has expired are dropped, so memory tracks active users only.
+    """
+
+    def __init__(self, limit=PREFETCH_BUDGET, window=PREFETCH_WINDOW):
+        self.limit = limit
+        self.window = window
+        self._spent = {}
+        self._swept_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _expire(self, spent, now):
+        while spent and now - spent[0] > self.window:
+            spent.popleft()
+
+    def take(self, user_id):
+        """Reserves one completion for user_id; returns False when the budget is spent."""
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            spent = self._spent.setdefault(user_id, deque())
+            self._expire(spent, now)
+            if len(spent) >= self.limit:
+                return False
+            spent.append(now)
+            return True
+
+    def refund(self, user_id):
+        """Gives back the latest reservation, e.g. when the prefetch could not be queued."""
+        with self._lock:
+            spent = self._spent.get(user_id)
+            if spent:
+                spent.pop()
+
+    def remaining(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            return self.limit - sum(1 for at in self._spent.get(user_id, ()) if now - at <= self.window)
+
+    def _sweep(self, now):
+        if now - self._swept_at < self.window:
+            return
+        self._swept_at = now
+        for user_id in list(self._spent):
+            spent = self._spent[user_id]
+            self._expire(spent, now)
+            if not spent:
+                del self._spent[user_id]
+
+
+_budget = PrefetchBudget()
+
+
+def likely_next_modes(mode, limit=PREFETCH_MAX_MODES):
+    return [m for m in NEXT_MODES.get(mode, DEFAULT_NEXT_MODES) if m != mode][:limit]
+
+
+def _task_key(prompt, model):
+    return "prefetch:" + make_cache_key(model, 0.7, SYSTEM_PROMPT, prompt, MAX_TOKENS)
+
+
+def schedule_prefetch(user_id, resume_text, jd_text, mode, model, budget=None, queue=None):
+    """
+    Queues completions for the modes a user is likely to try after mode, so
+    they are already in the response cache when selected. Skips modes that
+    are cached, and does nothing while the queue is busy with real jobs.
+    Returns the modes queued.
+    """
+    budget = budget or _budget
+    queue = queue or get_task_queue()
+    stats = queue.stats()
+    # Speculation only uses spare capacity: at most half the workers.
+    if stats[QUEUED] or stats[RUNNING] >= queue.max_workers // 2:
+        metrics.inc("prefetch_skipped_total", reason="busy")
+        return []
+
+    plans = []
+    for next_mode in likely_next_modes(mode):
+        prompt, primary, _ = plan_custom_prompt(resume_text, jd_text, next_mode, model=model)
+        if not is_cached(prompt, primary):
+            plans.append((next_mode, prompt, primary))
+
+    scheduled = []
+    for next_mode, prompt, primary in plans:
+        if not budget.take(user_id):
+            break
+        try:
+            queue.submit(_task_key(prompt, primary), lambda _, p=prompt, m=primary: complete(p, model=m))
+        except QueueFull:
+            budget.refund(user_id)
+            break
+        scheduled.append(next_mode)
+    metrics.inc("prefetch_scheduled_total", len(scheduled))
+    return scheduled
+
+
+def wait_for_prefetch(resume_text, jd_text, mode, section, model, timeout=PREFETCH_WAIT, queue=None):
+    """
+    If a prefetch of exactly this request is in flight, waits for it (or
+    cancels it if it has not started) so the real request hits the cache
+    instead of paying for the same completion twice.
+    """
+    queue = queue or get_task_queue()
+    prompt, primary, _ = plan_custom_prompt(resume_text, jd_text, mode, section, model)
+    key = _task_key(prompt, primary)
+    if queue.cancel(key):
+        return
+    task = queue.get(key)
+    if task is not None and not task.finished:
+        metrics.inc("prefetch_joined_total")
+        task.wait(timeout)
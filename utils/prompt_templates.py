@@ -1,27 +1,132 @@
 import re
-
+import string
+from functools import lru_cache
+from utils.resume_parser import segment_resume
+from utils.text_cleaning import compact_text, estimate_tokens
+
+RESUME_BUDGET_SHARE = 0.6   # share of the token budget reserved for the resume
+NO_JD_PLACEHOLDER = "[No JD provided]"
+ENTIRE_RESUME = "Entire Resume"
+
+# Section focus labels offered in the UI -> resume_parser section kinds.
+SECTION_LABELS = {
+    "Professional Summary": "summary",
+    "Summary": "summary",
+    "Experience": "experience",
+    "Education": "education",
+    "Projects": "projects",
+    "Skills": "skills",
+}
+
+# Resume sections each mode actually needs; modes not listed get the whole
+# resume. "header" is the name/contact block above the first heading. Modes
+# with a section picker in the UI ("Rewrite to Sound Results-Driven") are
+# left out: there "Entire Resume" is the user's explicit choice.
+MODE_SECTIONS = {
+    "Generate Professional Summary": ("header", "summary", "experience", "skills"),
+    "Generate Cover Letter": ("header", "summary", "experience", "projects", "skills"),
+}
+
+_TITLE_RE = re.compile(r"(?i)(?:role|title)\s*[:\-]\s*(.+)")
+
+@lru_cache(maxsize=256)
 def extract_job_title(jd_text):
     if not jd_text:
         return "the target role"
-    title_match = re.search(r"(?i)(?:role|title)\s*[:\-]\s*(.+)", jd_text)
+    title_match = _TITLE_RE.search(jd_text)
     if title_match:
         return title_match.group(1).strip().split('\n')[0]
     first_line = jd_text.strip().split('\n')[0]
     return first_line if len(first_line) < 80 else "the target role"
 
 def extract_section(resume, section_name):
-    pattern = rf"{section_name}.*?(?=\n[A-Z][a-z]+|\Z)"
-    match = re.search(pattern, resume, re.DOTALL | re.IGNORECASE)
-    return match.group(0).strip() if match else resume
-
-def build_prompt(resume_text, jd_text=None, mode="Brutal Resume Review", section="Entire Resume"):
-    job_title = extract_job_title(jd_text)
-
-    if section != "Entire Resume":
-        resume_text = extract_section(resume_text, section)
-
-    prompt_sections = {
-        "Full Resume Intelligence Report": f"""
+    kind = SECTION_LABELS.get(section_name, section_name.lower())
+    return segment_resume(resume).slice((kind,)) or resume
+
+def relevant_resume_text(resume, mode, section=ENTIRE_RESUME):
+    """
+    The slices of the resume a prompt needs: the focused section if one is
+    chosen, else the sections the mode uses. Falls back to the whole resume
+    when none of them can be found.
+    """
+    if section != ENTIRE_RESUME:
+        kinds = (SECTION_LABELS.get(section, section.lower()),)
+    else:
+        kinds = MODE_SECTIONS.get(mode)
+    if not kinds:
+        return resume
+    return segment_resume(resume).slice(kinds) or resume
+
+@lru_cache(maxsize=64)
+def compact_prompt_inputs(resume_text, jd_text=None, token_budget=None):
+    """
+    Cleans the resume (HTML, whitespace) and JD (also boilerplate) and, when
+    a token budget is given, trims them so together they fit it. Each side can
+    use whatever the other leaves unused.
+    """
+    # Boilerplate filters are for JD text: on a resume they drop real lines.
+    resume_text = compact_text(resume_text, drop_boilerplate=False)
+    jd_text = compact_text(jd_text) if jd_text else jd_text
+    if not token_budget:
+        return resume_text, jd_text
+
+    resume_tokens = estimate_tokens(resume_text)
+    jd_tokens = estimate_tokens(jd_text) if jd_text else 0
+    if resume_tokens + jd_tokens <= token_budget:
+        return resume_text, jd_text
+
+    resume_budget = max(int(token_budget * RESUME_BUDGET_SHARE), token_budget - jd_tokens)
+    jd_budget = token_budget - min(resume_tokens, resume_budget)
+    resume_text = compact_text(resume_text, resume_budget, drop_boilerplate=False)
+    if jd_text:
+        jd_text = compact_text(jd_text, jd_budget)
+    return resume_text, jd_text
+
+class PromptTemplate:
+    """
+    A prompt with {resume_text}, {jd_text} and {job_title} placeholders,
+    parsed once at registration and rendered only when its mode is used.
+    """
+
+    def __init__(self, mode, template):
+        self.mode = mode
+        self.template = template
+        self._parts = [
+            (literal, field) for literal, field, _, _ in string.Formatter().parse(template)
+        ]
+        self.fields = frozenset(field for _, field in self._parts if field)
+
+    def render(self, **values):
+        return "".join(literal + (str(values[field]) if field else "") for literal, field in self._parts)
+
+
+PROMPT_TEMPLATES = {}
+
+def register_template(mode, template):
+    """
+    Adds (or replaces) the prompt for an analysis mode.
+    """
+    PROMPT_TEMPLATES[mode] = PromptTemplate(mode, template)
+    return PROMPT_TEMPLATES[mode]
+
+def build_prompt(resume_text, jd_text=None, mode="Brutal Resume Review", section=ENTIRE_RESUME, token_budget=None):
+    template = PROMPT_TEMPLATES.get(mode)
+    if template is None:
+        return f"Invalid mode: {mode}"
+
+    # Slice before compacting: offsets refer to the parsed text, and the
+    # budget then goes to the sections that are actually sent.
+    resume_text = relevant_resume_text(resume_text, mode, section)
+    resume_text, jd_text = compact_prompt_inputs(resume_text, jd_text, token_budget)
+
+    return template.render(
+        resume_text=resume_text,
+        jd_text=jd_text if jd_text else NO_JD_PLACEHOLDER,
+        job_title=extract_job_title(jd_text) if "job_title" in template.fields else "",
+    )
+
+# -------------------- TEMPLATES --------------------
+register_template("Full Resume Intelligence Report", """
 You are an expert resume analyst and recruiter, well-versed in hiring trends, ATS systems, and top-tier candidate benchmarks.
 
 Given the following resume and job description, perform a complete multi-part evaluation and enhancement:
@@ -72,27 +177,72 @@ Resume:
 {resume_text}
 
 Job Description:
-{jd_text if jd_text else '[No JD provided]'}
-""",
+{jd_text}
+""")
+
+register_template("Resume Critique", """
+You are an expert resume analyst. Critique the resume below:
+- Identify and explain weak areas in the resume
+- Highlight vague statements, buzzwords, or lack of impact
+- Point out any sections that need rewriting, expansion, or quantification
+- Rate the overall effectiveness and clarity of the resume (out of 10)
+
+Resume:
+{resume_text}
+""")
+
+register_template("Role Alignment", """
+You are an expert recruiter. Compare the resume to the job description:
+- Highlight 5 strong alignment areas
+- List 5 key missing skills or phrases
+- Assign a Match Score out of 100 and explain it, note that it is extremely important that the match score is consistent everytime and that it has to be accurate and precise, also it has to be brutally honest and not lenient
+
+Resume:
+{resume_text}
+
+Job Description:
+{jd_text}
+""")
+
+register_template("Final Analysis Summary", """
+You are an expert resume analyst. Evaluate this resume against the job description and write:
+- An executive summary + a table of scores and metrics (clarity, impact, ATS readiness, role fit)
+- Conclude with: Ready to Apply, Needs Work, or Major Rewrite Needed
+
+Resume:
+{resume_text}
 
-        "Brutal Resume Review": f"""
+Job Description:
+{jd_text}
+""")
+
+register_template("Global Benchmarking Score", """
+You are a global hiring expert. Using global benchmarks for the role of "{job_title}":
+- Score this resume out of 100
+- Assign a percentile rank (e.g., Top 10%) and explain why
+
+Resume:
+{resume_text}
+""")
+
+register_template("Brutal Resume Review", """
 You are a seasoned recruiter reviewing the resume below. Be brutally honest.
 - Highlight vague statements, weak points, overused buzzwords, or missing metrics.
 - Give direct, specific feedback.
 
 Resume:
 {resume_text}
-""",
+""")
 
-        "Rewrite to Sound Results-Driven": f"""
+register_template("Rewrite to Sound Results-Driven", """
 Rewrite this resume to be results-driven and achievement-oriented.
 Use strong action verbs and quantify impact where possible.
 
 Resume:
 {resume_text}
-""",
+""")
 
-        "Optimize for ATS": f"""
+register_template("Optimize for ATS", """
 You are an ATS optimization expert.
 
 Update this resume for the role of "{job_title}" to:
@@ -102,27 +252,27 @@ Update this resume for the role of "{job_title}" to:
 
 Resume:
 {resume_text}
-""",
+""")
 
-        "Generate Professional Summary": f"""
+register_template("Generate Professional Summary", """
 Write a 3-line professional summary that hooks a recruiter in 10 seconds.
 Focus on value, clarity, and fit for the target role.
 
 Resume:
 {resume_text}
-""",
+""")
 
-        "Tailor Resume for Job Description": f"""
+register_template("Tailor Resume for Job Description", """
 Tailor this resume for the following job. Highlight matches and rephrase sections to align with the job language.
 
 Resume:
 {resume_text}
 
 Job Description:
-{jd_text if jd_text else '[No JD provided]'}
-""",
+{jd_text}
+""")
 
-        "Top 1% Candidate Benchmarking": f"""
+register_template("Top 1% Candidate Benchmarking", """
 Act like a hiring manager. Compare this resume to the job below.
 - What would a top 1% candidate include?
 - What should be improved?
@@ -131,10 +281,10 @@ Resume:
 {resume_text}
 
 Job Description:
-{jd_text if jd_text else '[No JD provided]'}
-""",
+{jd_text}
+""")
 
-        "Generate Cover Letter": f"""
+register_template("Generate Cover Letter", """
 Write a short (under 200 words), personalized cover letter based on this resume and job description.
 Make it enthusiastic, aligned, and recruiter-friendly.
 
@@ -142,16 +292,32 @@ Resume:
 {resume_text}
 
 Job Description:
-{jd_text if jd_text else '[No JD provided]'}
-""",
+{jd_text}
+""")
 
-        "Suggest Resume Format": f"""
+register_template("Suggest Resume Format", """
 Suggest a clean, modern, ATS-friendly resume format.
 Use Markdown or LaTeX. Avoid columns/graphics. Include standard sections like Summary, Skills, Experience, Education, Projects.
 
 Resume:
 {resume_text}
-"""
-    }
-
-    return prompt_sections.get(mode, f"Invalid mode: {mode}")
+""")
+
+
+PARALLEL_REPORT_MODE = "Full Resume Intelligence Report (Parallel)"
+
+# (heading, template mode, model tier) for each independent part of the
+# parallel report. "main" parts use the caller's model, "light" parts the
+# light model.
+REPORT_PARTS = [
+    ("PART 1: Resume Critique", "Resume Critique", "main"),
+    ("PART 2: Role Alignment", "Role Alignment", "main"),
+    ("PART 3: ATS Optimization", "Optimize for ATS", "main"),
+    ("PART 4: Rewrite with Results", "Rewrite to Sound Results-Driven", "main"),
+    ("PART 5: Top 1% Benchmarking", "Top 1% Candidate Benchmarking", "main"),
+    ("PART 6: Summary & Enhancement", "Generate Professional Summary", "light"),
+    ("PART 7: Resume Format Suggestion", "Suggest Resume Format", "light"),
+    ("PART 8: Cover Letter Generator", "Generate Cover Letter", "light"),
+    ("PART 9: Final Analysis Summary", "Final Analysis Summary", "main"),
+    ("PART 10: Global Benchmarking Score", "Global Benchmarking Score", "main"),
+]
@@ -0,0 +1,122 @@
+import math
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+MAX_FEATURES = 4096    # vocabulary size; matrix memory is ~8 bytes per distinct term per job
+TOP_K = 5
+
+_TOKEN_RE = re.compile(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or our that the their this to
+was we were will with you your who what which while about into over under more most other such
+than then there these they those through using use used via per etc also can may must should
+""".split())
+
+
+def tokenize(text):
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def job_document(job):
+    return " ".join([job.title] * 3 + [job.location, job.description])
+
+
+class JobRanker:
+    """
+    TF-IDF model over the job store. Every job is a row of an L2-normalised
+    float32 matrix stored sparse (CSR: indptr, indices, data), since a
+    posting uses a few hundred of the MAX_FEATURES terms; scoring a resume
+    against all jobs is one vectorised sparse mat-vec. Only the jobs' store
+    keys are kept; records are looked up when returned.
+    """
+
+    def __init__(self, store, max_features=MAX_FEATURES):
+        self.store = store
+        self.keys, token_lists = [], []
+        for job in store.scan(store.all_keys()):
+            self.keys.append((job.key, job.fetched_at))
+            token_lists.append(tokenize(job_document(job)))
+
+        df = Counter()
+        for tokens in token_lists:
+            df.update(set(tokens))
+        vocab = [term for term, _ in df.most_common(max_features)]
+        self.vocabulary = {term: i for i, term in enumerate(vocab)}
+
+        n_docs = len(token_lists)
+        self.idf = np.array(
+            [math.log((1 + n_docs) / (1 + df[term])) + 1 for term in vocab], dtype=np.float32
+        )
+
+        self.indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        indices, data = [], []
+        for row, tokens in enumerate(token_lists):
+            counts = Counter(self.vocabulary[t] for t in tokens if t in self.vocabulary)
+            cols = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+            weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts)) * self.idf[cols]
+            norm = np.linalg.norm(weights)
+            indices.append(cols)
+            data.append(weights / norm if norm > 0 else weights)
+            self.indptr[row + 1] = self.indptr[row] + len(cols)
+        self.indices = np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32)
+        self.data = np.concatenate(data) if data else np.zeros(0, dtype=np.float32)
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes + self.data.nbytes
+
+    def vectorize(self, text):
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term, count in Counter(tokenize(text)).items():
+            col = self.vocabulary.get(term)
+            if col is not None:
+                vector[col] = count
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def scores(self, resume_text):
+        """
+        Cosine similarity of the resume to every job, in job order.
+        """
+        if not len(self.keys):
+            return np.zeros(0, dtype=np.float32)
+        products = self.data * self.vectorize(resume_text)[self.indices]
+        # Row sums via prefix sums: no Python loop, and empty rows score 0.
+        totals = np.concatenate(([0.0], np.cumsum(products, dtype=np.float64)))
+        return (totals[self.indptr[1:]] - totals[self.indptr[:-1]]).astype(np.float32)
+
+    def top_k(self, resume_text, k=TOP_K):
+        """
+        Returns the k most similar jobs as [(job, similarity)], best first.
+        """
+        scores = self.scores(resume_text)
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        records = {job.key: job for job in self.store.get_many(self.keys[i] for i in best)}
+        return [(records[self.keys[i][0]], float(scores[i])) for i in best if self.keys[i][0] in records]
+
+
+_ranker = None
+_ranker_version = None
+_ranker_lock = threading.Lock()
+
+
+def get_job_ranker(job_store):
+    """
+    Process-wide ranker over the job store, rebuilt only when the index
+    has changed since the last build.
+    """
+    global _ranker, _ranker_version
+    version = job_store.index.version()
+    with _ranker_lock:
+        if _ranker is None or version != _ranker_version:
+            _ranker = JobRanker(job_store)
+            _ranker_version = version
+        return _ranker
@@ -1,21 +1,379 @@
-import pdfplumber
-import docx
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from io import BytesIO
 
-def extract_text_from_pdf(file):
-    text = ""
-    with pdfplumber.open(file) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() or ""
-    return text
+from utils import metrics
+
+PARSE_CACHE_MAX_BYTES = 32 * 1024 * 1024   # extracted text kept in memory
+PARSE_CACHE_MAX_ENTRIES = 256
+PDF_PARALLEL_MIN_PAGES = 8     # smaller PDFs are extracted in-process
+PDF_PAGES_PER_TASK = 4
+PDF_MAX_WORKERS = os.cpu_count() or 1
+
+# Section kinds and the headings that introduce them. Unlisted headings still
+# end the previous section when written in capitals after a blank line.
+SECTION_ALIASES = {
+    "summary": ("professional summary", "summary", "career summary", "objective", "career objective",
+                "profile", "professional profile", "about me"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "internships", "internship experience"),
+    "education": ("education", "academic background", "academics", "education and training"),
+    "projects": ("projects", "personal projects", "academic projects", "key projects"),
+    "skills": ("skills", "technical skills", "core competencies", "key skills", "tools and technologies"),
+    "other": ("certifications", "achievements", "awards", "publications", "languages", "interests",
+              "hobbies", "volunteering", "activities", "extracurricular activities", "references", "courses"),
+}
+SECTION_KINDS = ("summary", "experience", "education", "projects", "skills")
+HEADER, OTHER = "header", "other"   # text before the first heading; unrecognized sections
+
+_ALIAS_KIND = {alias: kind for kind, aliases in SECTION_ALIASES.items() for alias in aliases}
+_HEADING_CHARS_RE = re.compile(r"[^a-z& ]+")
+_MAX_HEADING_LENGTH = 40
+
+
+@dataclass(frozen=True)
+class Section:
+    """
+    One resume section: text[start:end] is the whole section including its
+    heading line, text[body_start:end] the body alone.
+    """
+    kind: str
+    heading: str
+    start: int
+    body_start: int
+    end: int
+
+
+class SectionIndex:
+    """
+    Typed sections of one resume text, in document order. Several sections
+    may share a kind (e.g. "Experience" and "Internships").
+    """
+
+    def __init__(self, text, sections):
+        self.text = text
+        self.sections = tuple(sections)
+
+    def __bool__(self):
+        return any(section.kind != HEADER for section in self.sections)
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    @property
+    def kinds(self):
+        return {section.kind for section in self.sections}
+
+    def body(self, kind):
+        """Joined bodies of every section of kind, or None if there is none."""
+        bodies = [self.text[s.body_start:s.end].strip() for s in self.sections if s.kind == kind]
+        return "\n".join(bodies) if bodies else None
+
+    def slice(self, kinds):
+        """
+        The sections of the given kinds, headings included, in document
+        order; None when the resume has none of them.
+        """
+        parts = [self.text[s.start:s.end].strip() for s in self.sections if s.kind in kinds]
+        parts = [part for part in parts if part]
+        return "\n\n".join(parts) if parts else None
+
+
+def _heading_kind(line, after_blank):
+    """(kind, offset of an inline body in line or None) if line is a heading, else None."""
+    stripped = line.strip()
+    head, colon, rest = stripped.partition(":")
+    if not head or len(head) > _MAX_HEADING_LENGTH:
+        return None
+    key = " ".join(_HEADING_CHARS_RE.sub(" ", head.lower()).split())
+    kind = _ALIAS_KIND.get(key)
+    if kind is not None:
+        if rest.strip():
+            # "Skills: Python, Go": the body starts on the heading line.
+            return kind, line.index(":") + 1
+        return kind, None
+    # An unlisted heading: a short all-caps line set off by a blank line.
+    if after_blank and not colon and len(key.replace(" ", "")) >= 5 and stripped.isupper() \
+            and len(stripped.split()) <= 4:
+        return OTHER, None
+    return None
+
+
+@lru_cache(maxsize=256)
+def segment_resume(text):
+    """
+    Splits resume text into typed sections in one pass over its lines and
+    returns a SectionIndex. Text before the first heading becomes the HEADER
+    section. Memoized, so prompts reuse the index built at parse time.
+    """
+    sections = []
+    current = None   # (kind, heading, start, body_start) of the open section
+    offset = 0
+    after_blank = False
+    for line in text.splitlines(keepends=True):
+        # Unlisted headings only count once a known one has been seen.
+        found = _heading_kind(line, after_blank and current is not None)
+        after_blank = not line.strip()
+        if found is not None:
+            kind, inline = found
+            if current is not None:
+                sections.append(Section(*current, end=offset))
+            elif text[:offset].strip():
+                sections.append(Section(HEADER, "", 0, 0, offset))
+            heading = (line[:inline - 1] if inline else line).strip().rstrip(":").strip()
+            current = (kind, heading, offset, offset + (inline or len(line)))
+        offset += len(line)
+    if current is not None:
+        sections.append(Section(*current, end=len(text)))
+    elif text.strip():
+        sections.append(Section(HEADER, "", 0, 0, len(text)))
+    return SectionIndex(text, sections)
+
+
+@dataclass(frozen=True)
+class ParsedResume:
+    digest: str
+    text: str
+    sections: SectionIndex = None
+
+
+def _read_bytes(uploaded_file):
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    position = uploaded_file.tell()
+    data = uploaded_file.read()
+    uploaded_file.seek(position)
+    return data
+
+def _extract_pages_layout(data, start, stop):
+    import pdfplumber
+
+    with pdfplumber.open(BytesIO(data), pages=list(range(start + 1, stop + 1))) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+def _extract_pages_plain(data, start, stop):
+    # Fast path: pdfminer without LAParams skips layout analysis entirely.
+    # Characters come out in content-stream order; a baseline change starts
+    # a new line and a wide horizontal gap becomes a space.
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LTChar
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+
+    resources = PDFResourceManager()
+    device = PDFPageAggregator(resources, laparams=None)
+    interpreter = PDFPageInterpreter(resources, device)
+    texts = []
+    for page in PDFPage.get_pages(BytesIO(data), pagenos=set(range(start, stop))):
+        interpreter.process_page(page)
+        parts, last = [], None
+        for item in device.get_result():
+            if not isinstance(item, LTChar):
+                continue
+            if last is not None:
+                if abs(item.y0 - last.y0) > last.height / 2:
+                    parts.append("\n")
+                elif item.x0 - last.x1 > last.width / 3:
+                    parts.append(" ")
+            parts.append(item.get_text())
+            last = item
+        texts.append("".join(parts))
+    device.close()
+    return texts
+
+def _extract_page_range(data, start, stop, plain):
+    return (_extract_pages_plain if plain else _extract_pages_layout)(data, start, stop)
+
+def _count_pdf_pages(data):
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdftypes import resolve1
+
+    document = PDFDocument(PDFParser(BytesIO(data)))
+    return resolve1(document.catalog["Pages"])["Count"]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=PDF_MAX_WORKERS)
+    return _pool
+
+def iter_pdf_pages(file, plain=False):
+    """
+    Yields the text of each page in order, as soon as it is extracted.
+    Large PDFs are split into page ranges extracted on a process pool.
+    With plain=True layout analysis is skipped, which is much faster but
+    keeps characters in content-stream order.
+    """
+    data = _read_bytes(file)
+    page_count = _count_pdf_pages(data)
+
+    if page_count < PDF_PARALLEL_MIN_PAGES or PDF_MAX_WORKERS < 2:
+        for start in range(0, page_count, PDF_PAGES_PER_TASK):
+            yield from _extract_page_range(data, start, min(start + PDF_PAGES_PER_TASK, page_count), plain)
+        return
+
+    pool = _get_pool()
+    futures = [
+        pool.submit(_extract_page_range, data, start, min(start + PDF_PAGES_PER_TASK, page_count), plain)
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+def extract_text_from_pdf(file, plain=False):
+    return "\n".join(iter_pdf_pages(file, plain=plain))
 
 def extract_text_from_docx(file):
+    import docx
+
     doc = docx.Document(file)
     return "\n".join([para.text for para in doc.paragraphs])
 
-def parse_resume(uploaded_file):
-    if uploaded_file.name.endswith(".pdf"):
-        return extract_text_from_pdf(uploaded_file)
-    elif uploaded_file.name.endswith(".docx"):
-        return extract_text_from_docx(uploaded_file)
+
+class ParseCache:
+    """
+    LRU cache of parsed resumes keyed by a digest of the uploaded bytes,
+    bounded by total extracted text size and entry count.
+    """
+
+    def __init__(self, max_bytes=PARSE_CACHE_MAX_BYTES, max_entries=PARSE_CACHE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        with self._lock:
+            parsed = self._entries.get(digest)
+            if parsed is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return parsed
+
+    def put(self, parsed):
+        size = len(parsed.text)
+        with self._lock:
+            if parsed.digest in self._entries:
+                return
+            self._entries[parsed.digest] = parsed
+            self._size += size
+            while self._entries and (self._size > self.max_bytes or len(self._entries) > self.max_entries):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.text)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+_parse_cache = ParseCache()
+metrics.register_collector(lambda: [
+    ("resume_parse_cache_hits", _parse_cache.hits, {}),
+    ("resume_parse_cache_misses", _parse_cache.misses, {}),
+    ("resume_parse_cache_entries", len(_parse_cache._entries), {}),
+])
+
+
+def parse_resume_document(uploaded_file, plain=False):
+    """
+    Parses an uploaded PDF/DOCX once per distinct content; reruns and repeat
+    uploads of the same bytes are served from the cache. plain=True skips
+    PDF layout analysis (see iter_pdf_pages), for bulk imports. Returns a
+    ParsedResume, or None for unsupported formats.
+    """
+    name = uploaded_file.name.lower()
+    if name.endswith(".pdf"):
+        extract = partial(extract_text_from_pdf, plain=plain)
+    elif name.endswith(".docx"):
+        extract = extract_text_from_docx
     else:
-        return "Unsupported file format."
\ No newline at end of file
+        return None
+
+    data = _read_bytes(uploaded_file)
+    digest = hashlib.sha256(data).hexdigest()
+    if plain and name.endswith(".pdf"):
+        # Plain extraction yields different text, so it is cached separately.
+        digest += ":plain"
+    parsed = _parse_cache.get(digest)
+    if parsed is None:
+        with metrics.timer("resume_parse", format=name.rsplit(".", 1)[-1]):
+            text = extract(BytesIO(data))
+        parsed = ParsedResume(digest=digest, text=text, sections=segment_resume(text))
+        _parse_cache.put(parsed)
+    return parsed
+
+def _extract_file(path, plain):
+    """
+    Process-pool task for parse_resume_files: (digest, text) for one file,
+    extracted in the worker itself, or None if it is unsupported or unreadable.
+    """
+    name = path.lower()
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if name.endswith(".pdf"):
+            if plain:
+                digest += ":plain"
+            text = "\n".join(_extract_page_range(data, 0, _count_pdf_pages(data), plain))
+        elif name.endswith(".docx"):
+            text = extract_text_from_docx(BytesIO(data))
+        else:
+            return None
+    except Exception:
+        return None
+    return digest, text
+
+def parse_resume_files(paths, plain=True):
+    """
+    Parses many resume files at once, one file per process-pool task, for
+    bulk imports where resumes are short and numerous (a single 1-3 page
+    PDF never reaches the per-page pool). Returns a ParsedResume, or None
+    for unsupported or unreadable files, per path in order.
+    """
+    paths = list(paths)
+    with metrics.timer("resume_parse_batch"):
+        if len(paths) < 2 or PDF_MAX_WORKERS < 2:
+            extracted = [_extract_file(path, plain) for path in paths]
+        else:
+            chunksize = max(1, len(paths) // (PDF_MAX_WORKERS * 4))
+            extracted = list(_get_pool().map(_extract_file, paths, [plain] * len(paths), chunksize=chunksize))
+
+    results = []
+    for item in extracted:
+        if item is None:
+            results.append(None)
+            continue
+        digest, text = item
+        parsed = _parse_cache.get(digest)
+        if parsed is None:
+            parsed = ParsedResume(digest=digest, text=text, sections=segment_resume(text))
+            _parse_cache.put(parsed)
+        results.append(parsed)
+    return results
+
+def parse_resume(uploaded_file):
+    parsed = parse_resume_document(uploaded_file)
+    return parsed.text if parsed else "Unsupported file format."
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import metrics
+
+QUEUE_MAX_WORKERS = int(os.environ.get("LAZYAPPLY_QUEUE_WORKERS", 8))   # jobs running at once
+QUEUE_MAX_PENDING = 64        # jobs waiting for a worker before submit() refuses more
+RESULT_TTL = 30 * 60          # seconds a finished job stays retrievable
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = frozenset({DONE, FAILED, CANCELLED})
+
+
+class QueueFull(Exception):
+    """Raised by submit() when the queue already holds QUEUE_MAX_PENDING waiting jobs."""
+
+
+class Task:
+    """
+    One queued job. status moves queued -> running -> done/failed (or
+    queued -> cancelled). partial holds the text streamed so far.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.partial = ""
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._future = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED
+
+    def set_partial(self, text):
+        self.partial = text
+
+    def wait(self, timeout=None):
+        """Blocks until the task finishes; returns True if it did within timeout."""
+        return self._done.wait(timeout)
+
+    def _finish(self, status, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.status = status
+        self._done.set()
+
+
+class TaskQueue:
+    """
+    Runs jobs on a bounded worker pool, independent of the Streamlit script
+    thread, so a rerun or a widget click does not lose an in-flight call.
+    Jobs are keyed: submitting a key that is queued, running or recently
+    finished returns the existing task instead of starting a new one.
+    """
+
+    def __init__(self, max_workers=QUEUE_MAX_WORKERS, max_pending=QUEUE_MAX_PENDING, result_ttl=RESULT_TTL):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task-queue")
+
+    def submit(self, key, func):
+        """
+        Enqueues func(on_progress) under key and returns its Task. on_progress
+        is a callback taking the text produced so far, stored as task.partial.
+        Failed and cancelled tasks are replaced; others are shared. Raises
+        QueueFull when too many jobs are waiting.
+        """
+        with self._lock:
+            self._prune()
+            task = self._tasks.get(key)
+            if task is not None and task.status not in (FAILED, CANCELLED):
+                metrics.inc("task_queue_deduplicated_total")
+                return task
+            if self._count(QUEUED) >= self.max_pending:
+                metrics.inc("task_queue_rejected_total")
+                raise QueueFull(f"{self.max_pending} jobs are already waiting")
+            task = self._tasks[key] = Task(key)
+            task._future = self._executor.submit(self._run, task, func)
+            metrics.inc("task_queue_submitted_total")
+        return task
+
+    def _run(self, task, func):
+        with self._lock:
+            if task.status == CANCELLED:
+                return
+            task.status = RUNNING
+            task.started_at = time.time()
+        metrics.observe("task_queue_wait_seconds", task.started_at - task.created_at)
+        try:
+            with metrics.timer("task_queue_job"):
+                result = func(task.set_partial)
+        except Exception as e:
+            task._finish(FAILED, error=e)
+        else:
+            task._finish(DONE, result=result)
+
+    def get(self, key):
+        with self._lock:
+            return self._tasks.get(key)
+
+    def cancel(self, key):
+        """Cancels a job that has not started yet. Returns True if it was cancelled."""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None or task.status != QUEUED or not task._future.cancel():
+                return False
+            task._finish(CANCELLED)
+            return True
+
+    def position(self, key):
+        """Number of queued jobs ahead of key, or None if it is not waiting."""
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None or task.status != QUEUED:
+                return None
+            return sum(1 for t in self._tasks.values() if t.status == QUEUED and t.created_at < task.created_at)
+
+    def stats(self):
+        with self._lock:
+            counts = {status: self._count(status) for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+        return dict(counts, max_workers=self.max_workers, max_pending=self.max_pending)
+
+    def _count(self, status):
+        return sum(1 for task in self._tasks.values() if task.status == status)
+
+    def _prune(self):
+        cutoff = time.time() - self.result_ttl
+        for key in [k for k, t in self._tasks.items() if t.finished and t.finished_at < cutoff]:
+            del self._tasks[key]
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def _collect_queue_stats():
+    if _queue is None:
+        return []
+    stats = _queue.stats()
+    return [("task_queue_jobs", stats[status], {"status": status}) for status in (QUEUED, RUNNING)]
+
+
+metrics.register_collector(_collect_queue_stats)
+
+
+def get_task_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = TaskQueue()
+    return _queue
@@ -0,0 +1,123 @@
+import html
+import math
+import re
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_BLOCK_TAG_RE = re.compile(r"<\s*(?:br|/p|/div|/li|/h[1-6]|/tr)\b[^>]*>", re.IGNORECASE)
+_SCRIPT_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_SPACE_BEFORE_PUNCT_RE = re.compile(r" +([,.;:!?)])")
+_SPACES_RE = re.compile(r"[ \t\r\f\v ]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+_HTML_HINT_RE = re.compile(r"&lt;|&gt;|&amp;|&quot;|<\s*/?\s*(?:div|p|span|br|li|ul|strong|a)\b", re.IGNORECASE)
+_TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+# Greenhouse wraps each company's standard intro/outro in these containers.
+BOILERPLATE_CLASSES = ("content-intro", "content-conclusion", "content-pay-transparency")
+BOILERPLATE_PATTERNS = re.compile(
+    r"equal (?:opportunity|employment)|reasonable accommodation|without regard to (?:race|sex|gender)"
+    r"|all rights reserved|privacy (?:policy|notice)|e-verify|by applying,? you|apply now|click here"
+    r"|follow us on|background check",
+    re.IGNORECASE,
+)
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[...truncated]"
+MIN_DEDUPE_LINE_LENGTH = 40   # short lines (job titles, skills) legitimately repeat
+
+
+def html_to_text(text, drop_boilerplate=False):
+    """
+    Turns Greenhouse job content into plain text. The API returns HTML that
+    is itself entity-escaped (&lt;div&gt;...), so it is unescaped before and
+    after the tags are stripped. drop_boilerplate also removes the board's
+    standard company intro/outro blocks.
+    """
+    if not text:
+        return ""
+    text = html.unescape(text)
+    if drop_boilerplate and any(name in text for name in BOILERPLATE_CLASSES):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(text, "html.parser")
+        for block in soup.find_all(class_=list(BOILERPLATE_CLASSES)):
+            block.decompose()
+        text = str(soup)
+    text = _SCRIPT_RE.sub(" ", text)
+    text = _BLOCK_TAG_RE.sub("\n", text)
+    text = _TAG_RE.sub(" ", text)
+    text = html.unescape(text)
+    text = _SPACES_RE.sub(" ", text)
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", text)
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def normalize_whitespace(text):
+    text = _SPACES_RE.sub(" ", text or "")
+    text = "\n".join(line.strip() for line in text.split("\n"))
+    return _BLANK_LINES_RE.sub("\n\n", text).strip()
+
+
+def remove_boilerplate(text):
+    """
+    Drops legal/marketing lines (EEO statements, privacy notices, "apply
+    now"...) and repeated long lines, keeping the first occurrence of each.
+    """
+    kept, seen = [], set()
+    for line in text.split("\n"):
+        key = line.strip().lower()
+        if key:
+            if key in seen or BOILERPLATE_PATTERNS.search(key):
+                continue
+            if len(key) >= MIN_DEDUPE_LINE_LENGTH:
+                seen.add(key)
+        kept.append(line)
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(kept)).strip()
+
+
+def estimate_tokens(text):
+    """
+    Local approximation of a BPE token count: each punctuation mark is one
+    token and each word roughly one token per CHARS_PER_TOKEN characters.
+    """
+    return sum(
+        math.ceil(len(piece) / CHARS_PER_TOKEN) if piece[0].isalnum() or piece[0] == "_" else 1
+        for piece in _TOKEN_PIECE_RE.findall(text or "")
+    )
+
+
+def trim_to_token_budget(text, max_tokens):
+    """
+    Cuts text at the last line or word boundary that fits in max_tokens.
+    """
+    if not text or max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text
+    used, cut = 0, 0
+    for match in _TOKEN_PIECE_RE.finditer(text):
+        piece = match.group(0)
+        used += math.ceil(len(piece) / CHARS_PER_TOKEN) if piece[0].isalnum() or piece[0] == "_" else 1
+        if used > max_tokens:
+            break
+        cut = match.end()
+    head = text[:cut]
+    boundary = head.rfind("\n")
+    if boundary < len(head) * 0.8:
+        boundary = head.rfind(" ")
+    if boundary > 0:
+        head = head[:boundary]
+    return head.rstrip() + TRUNCATION_MARKER
+
+
+def compact_text(text, max_tokens=None, drop_boilerplate=True):
+    """
+    Prompt preprocessing: strips (escaped) HTML, squeezes whitespace and
+    trims to max_tokens. drop_boilerplate, meant for job descriptions only,
+    also removes board intro/outro blocks, legal lines and duplicates.
+    """
+    if not text:
+        return text
+    if _HTML_HINT_RE.search(text):
+        text = html_to_text(text, drop_boilerplate=drop_boilerplate)
+    else:
+        text = normalize_whitespace(text)
+    if drop_boilerplate:
+        text = remove_boilerplate(text)
+    return trim_to_token_budget(text, max_tokens)